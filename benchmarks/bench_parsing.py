@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Benchmark stream-json parsing and output processing on 1 KB - 100 MB runs.
+
+Synthetic transcripts are fed through ClaudeInterface._parse_output,
+ClaudeInterface._parse_stream_line (on pre-decoded lines) and
+OutputProcessor.process. For each size the best-of-N throughput, the
+tracemalloc peak and the memory blocks still held after the call are
+reported, and the results are written to a JSON file (by default under
+benchmarks/results/, which is not tracked) so a later run can be compared
+against them. Baselines are machine-specific, so make one first:
+
+    git checkout main && python benchmarks/bench_parsing.py --output base.json
+    git checkout - && python benchmarks/bench_parsing.py --compare base.json
+
+Usage:
+    python benchmarks/bench_parsing.py [--sizes 1K,1M,100M] [--repeat N]
+        [--label NAME] [--output FILE] [--compare FILE] [--threshold PCT]
+"""
+
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.claude_interface import ClaudeInterface
+from src.output_processor import OutputProcessor
+from src.stream_events import JSON_BACKEND
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SIZES = "1K,10K,100K,1M,10M,100M"
+SESSION_ID = "0b7c5e7e-1f0a-4b7e-9a53-6f1d2c3b4a59"
+
+
+def parse_size(text: str) -> int:
+    """Parse a size like 10K or 100M into bytes."""
+    units = {"K": 1024, "M": 1024 * 1024}
+    text = text.strip().upper()
+    if text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    """Format bytes as the largest whole unit (e.g. 10M)."""
+    for unit, scale in (("M", 1024 * 1024), ("K", 1024)):
+        if size >= scale and size % scale == 0:
+            return f"{size // scale}{unit}"
+    return str(size)
+
+
+def make_transcript(size: int) -> str:
+    """Build a stream-json transcript of roughly size bytes.
+
+    Tool results carry most of the bulk, as they do on real runs that
+    read large files or dump command output.
+    """
+    lines = [json.dumps({"type": "system", "subtype": "init", "session_id": SESSION_ID, "tools": ["Read"] * 20})]
+    result_line = json.dumps({
+        "type": "result", "session_id": SESSION_ID, "result": "Done. " * 50,
+        "permission_denials": [], "total_cost_usd": 0.01,
+        "usage": {"input_tokens": 1000, "output_tokens": 200},
+    })
+
+    budget = size - len(lines[0]) - len(result_line) - 2
+    step = 0
+    while budget > 0:
+        assistant = json.dumps({
+            "type": "assistant",
+            "session_id": SESSION_ID,
+            "message": {"content": [
+                {"type": "text", "text": f"Step {step}: looking at the code " * 4},
+                {"type": "tool_use", "name": "Read", "input": {"file_path": f"src/m{step}.py"}},
+            ]},
+        })
+        tool_bytes = max(0, min(64 * 1024, budget - len(assistant) - 150))
+        tool_result = json.dumps({
+            "type": "user",
+            "session_id": SESSION_ID,
+            "message": {"content": [{"type": "tool_result", "content": "x" * tool_bytes}]},
+        })
+        lines.extend([assistant, tool_result])
+        budget -= len(assistant) + len(tool_result) + 2
+        step += 1
+
+    lines.append(result_line)
+    return "\n".join(lines) + "\n"
+
+
+def make_output(size: int) -> str:
+    """Build size characters of markdown-ish result text."""
+    line = "- updated src/module.py: refactored the handler and fixed the queue\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def measure(func, repeat: int) -> dict:
+    """Time func best-of-repeat, then run it once under tracemalloc."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = sys.getallocatedblocks() - blocks_before
+    del result
+
+    return {"seconds": best, "peak_bytes": peak, "retained_blocks": retained}
+
+
+def run_suite(sizes: list[int], repeat: int) -> list[dict]:
+    """Run every benchmark at every size."""
+    claude = ClaudeInterface(executable="claude")
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processor = OutputProcessor(tmp)
+
+        for size in sizes:
+            transcript = make_transcript(size)
+            decoded = [json.loads(line) for line in transcript.splitlines()]
+            output = make_output(size)
+            line_count = len(decoded)
+
+            cases = {
+                "parse_output": lambda: claude._parse_output(transcript),
+                "parse_stream_line": lambda: [claude._parse_stream_line(data) for data in decoded],
+                "output_process": lambda: processor.process(output=output, project_name="bench"),
+            }
+            for name, func in cases.items():
+                stats = measure(func, repeat)
+                stats.update({
+                    "benchmark": name,
+                    "size": size,
+                    "lines": line_count,
+                    "mb_per_s": size / stats["seconds"] / 1e6,
+                })
+                results.append(stats)
+                print(
+                    f"  {name:<18} {format_size(size):>5}  {stats['mb_per_s']:10.1f} MB/s  "
+                    f"peak {stats['peak_bytes'] / 1e6:9.2f} MB  "
+                    f"retained {stats['retained_blocks']:>8,} blocks"
+                )
+
+            del transcript, decoded, output
+            gc.collect()
+
+    return results
+
+
+def git_label() -> str:
+    """Describe the current commit, or fall back to a timestamp."""
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return datetime.now().strftime("%Y%m%d_%H%M%S")
+
+
+def compare(results: list[dict], baseline_path: Path, threshold: float) -> int:
+    """Print changes against a stored run. Returns the number of regressions."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path.name} (threshold {threshold:.0f}%):")
+    for result in results:
+        old = baseline.get((result["benchmark"], result["size"]))
+        if old is None:
+            continue
+        speed = (result["mb_per_s"] / old["mb_per_s"] - 1) * 100
+        memory = (result["peak_bytes"] / max(old["peak_bytes"], 1) - 1) * 100
+        flag = ""
+        if speed < -threshold or memory > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(
+            f"  {result['benchmark']:<18} {format_size(result['size']):>5}  "
+            f"throughput {speed:+7.1f}%  peak {memory:+7.1f}%{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated, e.g. 1K,1M,100M")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--label", help="Name for the results file (default: git describe)")
+    parser.add_argument(
+        "--output", type=Path,
+        help="Where to write the results (default: benchmarks/results/parsing-<label>.json)",
+    )
+    parser.add_argument("--compare", type=Path, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    sizes = [parse_size(s) for s in args.sizes.split(",")]
+    print(f"Python {platform.python_version()}, JSON backend: {JSON_BACKEND}")
+    results = run_suite(sizes, args.repeat)
+
+    label = args.label or git_label()
+    out_path = args.output or RESULTS_DIR / f"parsing-{label}.json"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "label": label,
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "json_backend": JSON_BACKEND,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults written to {out_path}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
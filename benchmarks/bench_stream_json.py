@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Benchmark stream-json line decoding: stdlib dicts vs the decoder layer.
+
+Usage:
+    python benchmarks/bench_stream_json.py [--lines N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.stream_events import JSON_BACKEND, decode_event, extract_assistant_content
+
+
+def make_lines(count: int) -> list[bytes]:
+    """Build a representative mix of init/assistant/user/result lines."""
+    session_id = "0b7c5e7e-1f0a-4b7e-9a53-6f1d2c3b4a59"
+    tool_result = "x" * 2000
+    lines = [{"type": "system", "subtype": "init", "session_id": session_id, "tools": ["Read"] * 20}]
+    for i in range(count - 2):
+        if i % 2 == 0:
+            lines.append({
+                "type": "assistant",
+                "session_id": session_id,
+                "message": {"content": [
+                    {"type": "text", "text": f"Step {i}: looking at the code " * 8},
+                    {"type": "tool_use", "name": "Read", "input": {"file_path": f"src/m{i}.py"}},
+                ]},
+            })
+        else:
+            lines.append({
+                "type": "user",
+                "session_id": session_id,
+                "message": {"content": [{"type": "tool_result", "content": tool_result}]},
+            })
+    lines.append({"type": "result", "session_id": session_id, "result": "Done", "permission_denials": []})
+    return [json.dumps(line).encode("utf-8") for line in lines]
+
+
+def legacy_parse(line: bytes) -> dict:
+    """The previous path: decode to str, json.loads, keep the dict."""
+    data = json.loads(line.decode("utf-8"))
+    if data.get("type") == "assistant":
+        extract_assistant_content(data)
+    return data
+
+
+def measure(name: str, func, lines: list[bytes], repeat: int = 3) -> float:
+    """Return the best lines/second over several runs."""
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(lines) / elapsed)
+    print(f"  {name:<24} {best:>12,.0f} lines/s")
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50_000)
+    args = parser.parse_args()
+
+    lines = make_lines(args.lines)
+    size_mb = sum(len(line) for line in lines) / 1e6
+    print(f"{len(lines):,} lines, {size_mb:.1f} MB, backend: {JSON_BACKEND}")
+
+    before = measure("stdlib json + dict", legacy_parse, lines)
+    after = measure(f"decode_event ({JSON_BACKEND})", decode_event, lines)
+    print(f"  speedup: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+@echo off
+REM Windows wrapper so fake_claude.py can be used as claude_code.executable
+python "%~dp0fake_claude.py" %*
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""Fake Claude Code CLI for deterministic load testing.
+
+Point ``claude_code.executable`` at this file (on Windows, at a .cmd
+wrapper running it with python) and the bridge runs against simulated
+stream-json output, with no network and no model calls. It accepts the
+flags the bridge passes (-p, --resume, --input-format stream-json,
+--allowedTools, --dangerously-skip-permissions, --permission-prompt-tool)
+and emits init, assistant/tool_use, tool_result and result events with
+usage, cost and permission_denials.
+
+Behaviour is set through environment variables:
+
+    FAKE_CLAUDE_LATENCY        Seconds per turn (default "lognormal:2,0.5")
+    FAKE_CLAUDE_STEPS          Tool-use steps per turn (default 3)
+    FAKE_CLAUDE_OUTPUT_BYTES   Size of the result text (default "fixed:2000")
+    FAKE_CLAUDE_TOOL_BYTES     Size of each tool result (default "fixed:4000")
+    FAKE_CLAUDE_FAILURE_RATE   Chance a turn crashes without a result (default 0)
+    FAKE_CLAUDE_DENIAL_RATE    Chance a non-allowed tool is denied (default 0.5)
+    FAKE_CLAUDE_SEED           Seed; each prompt gets its own stream (default 0)
+
+Distributions are "fixed:X", "uniform:A,B", "exp:MEAN" or
+"lognormal:MEDIAN,SIGMA". The same seed and prompt always produce the
+same run. Standard library only.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import uuid
+
+TOOLS = ["Read", "Glob", "Grep", "Edit", "Write", "Bash"]
+MODEL = "fake-claude"
+
+# Rough per-token prices (USD) so cost figures look plausible
+INPUT_PRICE = 3e-6
+OUTPUT_PRICE = 15e-6
+CACHE_READ_PRICE = 0.3e-6
+
+
+def sample(spec: str, rng: random.Random) -> float:
+    """Draw one value from a distribution spec like "lognormal:2,0.5"."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return rng.expovariate(1.0 / values[0]) if values[0] > 0 else 0.0
+    if kind == "lognormal":
+        return rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown distribution: {spec}")
+
+
+def filler(size: int, rng: random.Random) -> str:
+    """Build size characters of plausible text."""
+    words = ["the", "function", "returns", "a", "list", "of", "files", "in", "src", "and",
+             "tests", "updated", "config", "handler", "queue", "session", "output"]
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)[:size]
+
+
+class Simulator:
+    """Emits the stream-json events for one or more turns."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.session_id = args.resume or str(uuid.uuid4())
+        self.skip_permissions = args.dangerously_skip_permissions
+        self.prompt_tool = args.permission_prompt_tool
+        self.allowed = set(filter(None, (args.allowedTools or "").split(",")))
+
+        env = os.environ
+        self.latency = env.get("FAKE_CLAUDE_LATENCY", "lognormal:2,0.5")
+        self.steps = int(env.get("FAKE_CLAUDE_STEPS", "3"))
+        self.output_bytes = env.get("FAKE_CLAUDE_OUTPUT_BYTES", "fixed:2000")
+        self.tool_bytes = env.get("FAKE_CLAUDE_TOOL_BYTES", "fixed:4000")
+        self.failure_rate = float(env.get("FAKE_CLAUDE_FAILURE_RATE", "0"))
+        self.denial_rate = float(env.get("FAKE_CLAUDE_DENIAL_RATE", "0.5"))
+        self.seed = env.get("FAKE_CLAUDE_SEED", "0")
+
+    def emit(self, event: dict) -> None:
+        """Write one stream-json line."""
+        event["session_id"] = self.session_id
+        sys.stdout.write(json.dumps(event) + "\n")
+        sys.stdout.flush()
+
+    def init(self) -> None:
+        """Emit the system init event."""
+        self.emit({
+            "type": "system",
+            "subtype": "init",
+            "cwd": os.getcwd(),
+            "tools": TOOLS,
+            "model": MODEL,
+            "permissionMode": "bypassPermissions" if self.skip_permissions else "default",
+        })
+
+    def is_denied(self, tool: str, rng: random.Random) -> bool:
+        """Decide whether a tool call is denied under the current flags."""
+        # With a permission prompt tool the bridge answers mid-run; treat as approved
+        if self.skip_permissions or self.prompt_tool or tool in self.allowed:
+            return False
+        return rng.random() < self.denial_rate
+
+    def turn(self, prompt: str) -> bool:
+        """Run one turn. Returns False if the simulated run crashed."""
+        rng = random.Random(f"{self.seed}:{prompt}")
+        started = time.monotonic()
+        total_latency = max(0.0, sample(self.latency, rng))
+        step_delay = total_latency / (self.steps + 1)
+        crash_at = rng.randrange(self.steps + 1) if rng.random() < self.failure_rate else None
+
+        denials = []
+        input_tokens = len(prompt) // 4 + 50
+        output_tokens = 0
+
+        for step in range(self.steps):
+            time.sleep(step_delay)
+            if crash_at == step:
+                sys.stderr.write("Error: simulated failure (API overloaded)\n")
+                return False
+
+            tool = rng.choice(TOOLS)
+            tool_id = f"toolu_{rng.getrandbits(64):016x}"
+            tool_input = {"file_path": f"src/module_{rng.randrange(100)}.py"}
+            if tool == "Bash":
+                tool_input = {"command": f"pytest -q tests/test_{rng.randrange(100)}.py"}
+            text = filler(int(rng.uniform(40, 400)), rng)
+            output_tokens += len(text) // 4 + 20
+
+            self.emit({
+                "type": "assistant",
+                "message": {
+                    "id": f"msg_{rng.getrandbits(64):016x}",
+                    "role": "assistant",
+                    "model": MODEL,
+                    "content": [
+                        {"type": "text", "text": text},
+                        {"type": "tool_use", "id": tool_id, "name": tool, "input": tool_input},
+                    ],
+                },
+            })
+
+            denied = self.is_denied(tool, rng)
+            if denied:
+                denials.append({"tool_name": tool, "tool_use_id": tool_id, "tool_input": tool_input})
+                content = f"Claude requested permissions to use {tool}, but you haven't granted it yet."
+            else:
+                content = filler(int(sample(self.tool_bytes, rng)), rng)
+            input_tokens += len(content) // 4
+
+            self.emit({
+                "type": "user",
+                "message": {
+                    "role": "user",
+                    "content": [{
+                        "type": "tool_result",
+                        "tool_use_id": tool_id,
+                        "content": content,
+                        "is_error": denied,
+                    }],
+                },
+            })
+
+        time.sleep(step_delay)
+        if crash_at == self.steps:
+            sys.stderr.write("Error: simulated failure (connection reset)\n")
+            return False
+
+        result = filler(int(sample(self.output_bytes, rng)), rng)
+        output_tokens += len(result) // 4
+        self.emit({
+            "type": "assistant",
+            "message": {"role": "assistant", "model": MODEL, "content": [{"type": "text", "text": result}]},
+        })
+
+        cache_read = rng.randrange(10_000, 40_000)
+        cost = input_tokens * INPUT_PRICE + output_tokens * OUTPUT_PRICE + cache_read * CACHE_READ_PRICE
+        self.emit({
+            "type": "result",
+            "subtype": "success",
+            "is_error": False,
+            "duration_ms": int((time.monotonic() - started) * 1000),
+            "num_turns": self.steps + 1,
+            "result": result,
+            "total_cost_usd": round(cost, 6),
+            "usage": {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": cache_read,
+            },
+            "permission_denials": denials,
+        })
+        return True
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse the subset of Claude CLI flags the bridge uses."""
+    parser = argparse.ArgumentParser(description="Fake Claude Code CLI")
+    parser.add_argument("-p", "--print", action="store_true")
+    parser.add_argument("--resume")
+    parser.add_argument("--output-format", default="text")
+    parser.add_argument("--input-format", default="text")
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--allowedTools")
+    parser.add_argument("--dangerously-skip-permissions", action="store_true")
+    parser.add_argument("--mcp-config")
+    parser.add_argument("--permission-prompt-tool")
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def main() -> int:
+    args = parse_args()
+    sim = Simulator(args)
+
+    if args.input_format != "stream-json":
+        prompt = sys.stdin.read()
+        sim.init()
+        return 0 if sim.turn(prompt) else 1
+
+    # Persistent mode: one user message per line until stdin closes
+    sim.init()
+    for line in sys.stdin:
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        content = message.get("message", {}).get("content", "")
+        if isinstance(content, list):
+            content = " ".join(block.get("text", "") for block in content if isinstance(block, dict))
+        if not sim.turn(content):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""End-to-end load test of the bridge against the fake Claude CLI.
+
+Tasks are pushed through QueueManager into TelegramBot._process_task,
+which runs benchmarks/fake_claude.py and formats results with
+OutputProcessor. Telegram itself is replaced by an in-memory bot that
+records sends, so nothing leaves the machine.
+
+Usage:
+    python benchmarks/load_test.py [--tasks N] [--projects P] [--latency SPEC]
+        [--output-bytes SPEC] [--failure-rate R] [--approval-mode MODE]
+        [--persistent] [--warm-pool N] [--max-concurrent N] [--worktrees N]
+        [--live-progress] [--seed S]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.config import (
+    ClaudeCodeConfig,
+    Config,
+    ProjectConfig,
+    QueueConfig,
+    SessionsConfig,
+    TelegramConfig,
+)
+from src.queue_manager import QueuedTask
+from src.telegram_bot import TelegramBot
+
+FAKE_CLAUDE = Path(__file__).parent / (
+    "fake_claude.cmd" if sys.platform == "win32" else "fake_claude.py"
+)
+
+
+class RecordingBot:
+    """Stands in for telegram.Bot; records the last message per chat."""
+
+    def __init__(self):
+        self.sent = 0
+        self.edits = 0
+        self._next_id = 0
+        self.last_text: dict[int, str] = {}
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.sent += 1
+        self._next_id += 1
+        self.last_text[chat_id] = text
+        return SimpleNamespace(message_id=self._next_id, chat_id=chat_id)
+
+    async def send_document(self, chat_id: int, document, filename: str, **kwargs):
+        self.sent += 1
+
+    async def edit_message_text(self, text: str, chat_id: int, message_id: int, **kwargs):
+        self.edits += 1
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def build_config(args: argparse.Namespace, root: Path) -> Config:
+    """Build an in-memory config pointing every project at the fake CLI."""
+    projects = {}
+    for i in range(args.projects):
+        path = root / f"project{i}"
+        path.mkdir()
+        if args.worktrees:
+            # Worktree pools need a repository with a commit to branch from
+            (path / "README.md").write_text(f"project {i}\n")
+            for command in (
+                ["git", "init", "-q"],
+                ["git", "add", "-A"],
+                ["git", "-c", "user.name=load", "-c", "user.email=load@test", "commit", "-qm", "init"],
+            ):
+                subprocess.run(command, cwd=path, check=True, capture_output=True)
+        projects[f"p{i}"] = ProjectConfig(
+            path=str(path), approval_mode=args.approval_mode, worktrees=args.worktrees
+        )
+
+    config = Config(
+        telegram=TelegramConfig(bot_token="0:load-test", authorized_user_id=0),
+        projects=projects,
+        default_project="p0",
+        claude_code=ClaudeCodeConfig(
+            executable=str(FAKE_CLAUDE),
+            default_approval_mode=args.approval_mode,
+            live_progress=args.live_progress,
+            persistent_sessions=args.persistent,
+            warm_pool_size=args.warm_pool,
+        ),
+        sessions=SessionsConfig(storage_path=str(root / "sessions")),
+        queue=QueueConfig(max_concurrent=args.max_concurrent),
+        outputs_path=str(root / "outputs"),
+    )
+    Path(config.sessions.storage_path).mkdir()
+    Path(config.outputs_path).mkdir()
+    return config
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        bot = TelegramBot(build_config(args, Path(tmp)))
+        recorder = RecordingBot()
+        bot.app = SimpleNamespace(bot=recorder)
+
+        # Time OutputProcessor.process and queue wait separately
+        process_times: list[float] = []
+        original_process = bot.output.process
+
+        def timed_process(**kwargs):
+            start = time.perf_counter()
+            try:
+                return original_process(**kwargs)
+            finally:
+                process_times.append(time.perf_counter() - start)
+
+        bot.output.process = timed_process
+
+        submitted: dict[int, float] = {}
+        started: dict[int, float] = {}
+        finished: dict[int, float] = {}
+        all_done = asyncio.Event()
+
+        async def processor(task: QueuedTask) -> None:
+            started[task.chat_id] = time.monotonic()
+            try:
+                await bot._process_task(task)
+            finally:
+                finished[task.chat_id] = time.monotonic()
+                if len(finished) == args.tasks:
+                    all_done.set()
+
+        begin = time.monotonic()
+        for i in range(args.tasks):
+            chat_id = i + 1
+            task = QueuedTask(
+                project_name=f"p{i % args.projects}",
+                prompt=f"load test task {i}",
+                image_paths=[],
+                message_id=i,
+                chat_id=chat_id,
+                callback=lambda: None,
+            )
+            submitted[chat_id] = time.monotonic()
+            await bot.queue.enqueue(task, processor)
+
+        await all_done.wait()
+        elapsed = time.monotonic() - begin
+        pool = bot.claude.get_pool_stats()
+
+        # bot.stop() without the Telegram and scheduler parts, which never started;
+        # the task store must be closed before its directory is removed
+        await bot.queue.close()
+        await bot.persistent.close_all()
+        await bot.claude.shutdown()
+        await bot.sessions.close()
+        await bot.usage.close()
+
+    latencies = [finished[c] - submitted[c] for c in submitted]
+    waits = [started[c] - submitted[c] for c in started]
+    failures = sum(1 for text in recorder.last_text.values() if text.startswith("Error:"))
+
+    print(f"{args.tasks} tasks over {args.projects} project(s), latency {args.latency}, "
+          f"mode {args.approval_mode}{', persistent' if args.persistent else ''}"
+          f"{f', {args.worktrees} worktrees each' if args.worktrees else ''}")
+    print(f"  wall time:       {elapsed:8.2f} s")
+    print(f"  throughput:      {args.tasks / elapsed:8.2f} tasks/s")
+    print(f"  failed results:  {failures:8d}")
+    for name, values in (("end-to-end", latencies), ("queue wait", waits)):
+        print(f"  {name + ':':<16} p50 {percentile(values, 50):6.2f}s  "
+              f"p95 {percentile(values, 95):6.2f}s  p99 {percentile(values, 99):6.2f}s")
+    print(f"  output process:  mean {statistics.mean(process_times) * 1000:6.2f} ms  "
+          f"max {max(process_times) * 1000:6.2f} ms")
+    print(f"  telegram calls:  {recorder.sent} sends, {recorder.edits} edits")
+    if args.warm_pool:
+        print(f"  warm pool:       {pool['hits']} hits, {pool['misses']} misses")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--projects", type=int, default=5)
+    parser.add_argument("--latency", default="lognormal:0.5,0.5", help="Seconds per run")
+    parser.add_argument("--output-bytes", default="lognormal:2000,1.0")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--approval-mode", choices=["safe", "auto-all"], default="auto-all")
+    parser.add_argument("--persistent", action="store_true")
+    parser.add_argument("--warm-pool", type=int, default=0)
+    parser.add_argument("--max-concurrent", type=int, default=0, help="Global run budget (0 = unlimited)")
+    parser.add_argument("--worktrees", type=int, default=0, help="Git worktrees per project (0 = off)")
+    parser.add_argument("--live-progress", action="store_true")
+    parser.add_argument("--seed", default="0")
+    args = parser.parse_args()
+
+    # Inherited by every fake claude process
+    os.environ.update({
+        "FAKE_CLAUDE_LATENCY": args.latency,
+        "FAKE_CLAUDE_OUTPUT_BYTES": args.output_bytes,
+        "FAKE_CLAUDE_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_CLAUDE_SEED": args.seed,
+    })
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,28 @@
 """Claude Code CLI interface for Telegram Bridge."""
 
 import asyncio
-import json
 import logging
+import os
+import signal
 import subprocess
 import sys
+import time
+import weakref
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+from .permission_server import PERMISSION_PROMPT_TOOL
+from .resource_monitor import ResourceMonitor, ResourceUsage
+from .stream_events import (
+    AssistantEvent,
+    ResultEvent,
+    StreamEvent,
+    SystemEvent,
+    TokenUsage,
+    decode_event,
+    event_from_dict,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +39,18 @@ SAFE_TOOLS = [
     "Bash(git log)",
 ]
 
+# Max bytes buffered for a single stdout line (large tool results arrive as one line)
+STREAM_LINE_LIMIT = 16 * 1024 * 1024
+
+# Seconds between SIGTERM and SIGKILL when cancelling a run
+KILL_GRACE_PERIOD = 5.0
+
+# Bytes of stderr kept per run and attached to error messages
+STDERR_TAIL_BYTES = 8 * 1024
+
+# Seconds a process may keep running (hooks, telemetry) after its result is delivered
+REAP_TIMEOUT = 60.0
+
 
 @dataclass
 class ClaudeResult:
@@ -33,6 +60,10 @@ class ClaudeResult:
     session_id: Optional[str] = None
     permission_denials: list[dict] = field(default_factory=list)
     error: Optional[str] = None
+    stderr_bytes: int = 0
+    resources: Optional[ResourceUsage] = None
+    usage: Optional[TokenUsage] = None
+    result_at: Optional[float] = None  # time.monotonic() when the result event was parsed
 
 
 @dataclass
@@ -41,7 +72,41 @@ class StreamUpdate:
     type: str  # init, assistant, result, error
     content: str
     session_id: Optional[str] = None
-    raw_data: Optional[dict] = None
+    event: Optional[StreamEvent] = None
+
+
+@dataclass
+class _ParseState:
+    """Running state while consuming stream-json output line by line."""
+    session_id: Optional[str] = None
+    result_text: str = ""
+    last_assistant_content: str = ""
+    permission_denials: list[dict] = field(default_factory=list)
+    bytes_read: int = 0
+    got_result: bool = False
+    usage: Optional[TokenUsage] = None
+    result_at: Optional[float] = None
+
+
+class StderrCapture:
+    """Bounded ring buffer for a process's stderr, keeping only the tail."""
+
+    def __init__(self, max_bytes: int = STDERR_TAIL_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> None:
+        """Append a chunk, dropping the oldest bytes beyond max_bytes."""
+        self.total_bytes += len(chunk)
+        self._buffer += chunk
+        overflow = len(self._buffer) - self.max_bytes
+        if overflow > 0:
+            del self._buffer[:overflow]
+
+    def tail(self) -> str:
+        """Get the retained tail as text."""
+        return self._buffer.decode("utf-8", errors="replace").strip()
 
 
 class ClaudeInterface:
@@ -51,18 +116,40 @@ class ClaudeInterface:
         self,
         executable: str = "claude",
         timeout: int = 1800,
+        pool_size: int = 0,
+        pool_idle_timeout: float = 600.0,
     ):
         self.executable = executable
         self.timeout = timeout
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
         self._is_windows = sys.platform == "win32"
+        # Warm processes keyed by (working_dir, command), blocked on stdin
+        self._pool: dict[tuple[str, tuple[str, ...]], list[asyncio.subprocess.Process]] = {}
+        # Per working_dir: pending refill, and the timer that evicts its idle processes
+        self._refill_tasks: dict[str, asyncio.Task] = {}
+        self._pool_timers: dict[str, asyncio.TimerHandle] = {}
+        self.pool_hits = 0
+        self.pool_misses = 0
+        # Every spawned CLI process, so shutdown can reap them
+        self._processes: weakref.WeakSet[asyncio.subprocess.Process] = weakref.WeakSet()
+        self._terminate_tasks: set[asyncio.Task] = set()
 
     def _build_command(
         self,
         session_id: Optional[str] = None,
         approval_mode: str = "safe",
         allowed_tools: Optional[list[str]] = None,
+        permission_prompt_config: Optional[str] = None,
+        stream_input: bool = False,
     ) -> list[str]:
-        """Build Claude CLI command (prompt passed via stdin)."""
+        """Build Claude CLI command (prompt passed via stdin).
+
+        With stream_input, prompts are sent as stream-json user messages and
+        the process stays alive between turns until stdin is closed. With
+        permission_prompt_config (an MCP config path from PermissionServer),
+        permission checks are answered mid-run instead of being denied.
+        """
         cmd = [self.executable]
 
         # Resume session if exists
@@ -71,6 +158,8 @@ class ClaudeInterface:
 
         # Output format - use -p for print mode, prompt comes from stdin
         cmd.extend(["-p", "--output-format", "stream-json", "--verbose"])
+        if stream_input:
+            cmd.extend(["--input-format", "stream-json"])
 
         # Approval mode handling
         if approval_mode == "auto-all":
@@ -84,8 +173,253 @@ class ClaudeInterface:
             cmd.extend(["--allowedTools", ",".join(allowed_tools)])
         # ask-all with no allowed_tools: no flags, will return permission_denials
 
+        if permission_prompt_config:
+            cmd.extend([
+                "--mcp-config", permission_prompt_config,
+                "--permission-prompt-tool", PERMISSION_PROMPT_TOOL,
+            ])
+
         return cmd
 
+    async def _spawn(self, cmd: list[str], working_dir: str) -> asyncio.subprocess.Process:
+        """Spawn the Claude CLI with piped stdio in its own process group."""
+        if self._is_windows:
+            # On Windows, use shell=True to resolve .cmd files from PATH
+            cmd_str = subprocess.list2cmdline(cmd)
+            logger.info(f"Windows command: {cmd_str}")
+            process = await asyncio.create_subprocess_shell(
+                cmd_str,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir,
+                limit=STREAM_LINE_LIMIT,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP,
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=working_dir,
+                limit=STREAM_LINE_LIMIT,
+                start_new_session=True,
+            )
+        self._processes.add(process)
+        return process
+
+    async def terminate_process(
+        self,
+        process: asyncio.subprocess.Process,
+        grace_period: float = KILL_GRACE_PERIOD,
+    ) -> None:
+        """Terminate a CLI process and everything it started.
+
+        Sends SIGTERM to the process group, then SIGKILL if it is still
+        running after grace_period. On Windows the tree is killed at once.
+        """
+        if process.returncode is not None:
+            return
+
+        if self._is_windows:
+            # The shell wrapper's children (node, tools) go with /T
+            killer = await asyncio.create_subprocess_exec(
+                "taskkill", "/T", "/F", "/PID", str(process.pid),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            await killer.wait()
+            await process.wait()
+            return
+
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+            await asyncio.wait_for(process.wait(), timeout=grace_period)
+        except asyncio.TimeoutError:
+            logger.warning(f"Claude process {process.pid} ignored SIGTERM, killing")
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+    def _terminate_in_background(self, process: asyncio.subprocess.Process) -> None:
+        """Terminate a process without making the caller wait out the grace period."""
+        if process.returncode is not None:
+            return
+        task = asyncio.create_task(self.terminate_process(process))
+        self._terminate_tasks.add(task)
+        task.add_done_callback(self._terminate_tasks.discard)
+
+    def _reap_in_background(
+        self,
+        process: asyncio.subprocess.Process,
+        stderr_task: asyncio.Task,
+    ) -> None:
+        """Let a process whose result was already delivered finish on its own."""
+        task = asyncio.create_task(self._reap(process, stderr_task))
+        self._terminate_tasks.add(task)
+        task.add_done_callback(self._terminate_tasks.discard)
+
+    async def _reap(
+        self,
+        process: asyncio.subprocess.Process,
+        stderr_task: asyncio.Task,
+        timeout: float = REAP_TIMEOUT,
+    ) -> None:
+        """Drain stdout until the process exits, terminating it after timeout."""
+        async def drain() -> None:
+            async for _ in process.stdout:
+                pass
+            await process.wait()
+            await stderr_task
+
+        try:
+            await asyncio.wait_for(drain(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Claude process {process.pid} still running {timeout:.0f}s after its result, terminating"
+            )
+            await self.terminate_process(process)
+        except Exception as e:
+            logger.warning(f"Reaping claude process {process.pid} failed: {e}")
+            await self.terminate_process(process)
+        finally:
+            stderr_task.cancel()
+
+    async def _acquire(self, cmd: list[str], working_dir: str) -> asyncio.subprocess.Process:
+        """Take a warm process for this command if one is ready, else spawn."""
+        if self.pool_size > 0:
+            warm = self._pool.get((working_dir, tuple(cmd)))
+            while warm:
+                process = warm.pop()
+                if process.returncode is None:
+                    self.pool_hits += 1
+                    logger.info(f"Warm pool hit ({self.pool_hits} hits, {self.pool_misses} misses)")
+                    return process
+            self.pool_misses += 1
+            logger.info(f"Warm pool miss ({self.pool_hits} hits, {self.pool_misses} misses)")
+        return await self._spawn(cmd, working_dir)
+
+    def _schedule_refill(
+        self,
+        working_dir: str,
+        session_id: Optional[str],
+        approval_mode: str,
+        permission_prompt_config: Optional[str] = None,
+    ) -> None:
+        """Pre-spawn processes for the next likely run in working_dir."""
+        if self.pool_size <= 0:
+            return
+        # Next message resumes this session with the project's default tools
+        cmd = self._build_command(
+            session_id=session_id,
+            approval_mode=approval_mode,
+            permission_prompt_config=permission_prompt_config,
+        )
+        # Only the latest run's refill matters
+        pending = self._refill_tasks.get(working_dir)
+        if pending:
+            pending.cancel()
+        task = asyncio.create_task(self._refill(working_dir, cmd))
+        self._refill_tasks[working_dir] = task
+        task.add_done_callback(lambda t: self._refill_done(working_dir, t))
+
+    def _refill_done(self, working_dir: str, task: asyncio.Task) -> None:
+        """Forget a finished refill unless a newer one replaced it."""
+        if self._refill_tasks.get(working_dir) is task:
+            del self._refill_tasks[working_dir]
+
+    async def _refill(self, working_dir: str, cmd: list[str]) -> None:
+        """Replace the warm processes for working_dir with fresh ones for cmd."""
+        # Everything warm in this directory is stale: other sessions or flags,
+        # and same-command processes that loaded the session before this turn
+        self._evict(working_dir)
+
+        fresh: list[asyncio.subprocess.Process] = []
+        try:
+            for _ in range(self.pool_size):
+                fresh.append(await self._spawn(cmd, working_dir))
+        except asyncio.CancelledError:
+            for process in fresh:
+                self._discard(process)
+            raise
+        except Exception as e:
+            logger.warning(f"Warm pool refill failed: {e}")
+
+        if fresh:
+            self._pool[(working_dir, tuple(cmd))] = fresh
+            # Warm processes don't count toward the run budget; don't keep them forever
+            self._pool_timers[working_dir] = asyncio.get_running_loop().call_later(
+                self.pool_idle_timeout, self._evict, working_dir
+            )
+
+    def _evict(self, working_dir: str) -> None:
+        """Kill all warm processes for working_dir."""
+        timer = self._pool_timers.pop(working_dir, None)
+        if timer:
+            timer.cancel()
+        for key in [k for k in self._pool if k[0] == working_dir]:
+            for process in self._pool.pop(key):
+                self._discard(process)
+
+    def _discard(self, process: asyncio.subprocess.Process) -> None:
+        """Kill an unused warm process."""
+        self._terminate_in_background(process)
+
+    def get_pool_stats(self) -> dict[str, int]:
+        """Get warm pool hit/miss counters and current size."""
+        return {
+            "hits": self.pool_hits,
+            "misses": self.pool_misses,
+            "warm": sum(len(warm) for warm in self._pool.values()),
+        }
+
+    async def close_pool(self) -> None:
+        """Kill all warm processes and stop pending refills."""
+        for task in list(self._refill_tasks.values()):
+            task.cancel()
+        for working_dir in {key[0] for key in self._pool}:
+            self._evict(working_dir)
+
+    async def shutdown(self) -> None:
+        """Terminate every CLI process still running, including warm ones."""
+        await self.close_pool()
+        await asyncio.gather(
+            *(self.terminate_process(p) for p in list(self._processes)),
+            *list(self._terminate_tasks),
+            return_exceptions=True,
+        )
+
+    async def _drain_stderr(
+        self,
+        process: asyncio.subprocess.Process,
+        capture: StderrCapture,
+    ) -> None:
+        """Read stderr until EOF so a chatty CLI can never block on the pipe."""
+        while True:
+            chunk = await process.stderr.read(64 * 1024)
+            if not chunk:
+                return
+            capture.feed(chunk)
+
+    def _with_stderr(self, error: str, capture: StderrCapture) -> str:
+        """Append the captured stderr tail to an error message."""
+        tail = capture.tail()
+        if not tail:
+            return error
+        return f"{error}\n\nstderr:\n{tail}"
+
+    async def _write_prompt(self, process: asyncio.subprocess.Process, prompt: str) -> None:
+        """Write prompt to stdin and close it."""
+        process.stdin.write(prompt.encode("utf-8"))
+        await process.stdin.drain()
+        process.stdin.close()
+        await process.stdin.wait_closed()
+
     async def execute(
         self,
         prompt: str,
@@ -93,67 +427,104 @@ class ClaudeInterface:
         session_id: Optional[str] = None,
         approval_mode: str = "safe",
         allowed_tools: Optional[list[str]] = None,
+        permission_prompt_config: Optional[str] = None,
     ) -> ClaudeResult:
-        """Execute a prompt and return the full result."""
+        """Execute a prompt and return the full result.
+
+        Output is consumed one line at a time, so memory use stays bounded
+        by the longest single line rather than the whole transcript.
+        """
         cmd = self._build_command(
             session_id=session_id,
             approval_mode=approval_mode,
             allowed_tools=allowed_tools,
+            permission_prompt_config=permission_prompt_config,
         )
 
         logger.info(f"Executing: {' '.join(cmd)}")
         logger.info(f"Prompt: {prompt[:100]}...")
         logger.info(f"Working dir: {working_dir}")
 
+        process = None
+        state = _ParseState()
+        capture = StderrCapture()
+
+        async def run() -> None:
+            await self._write_prompt(process, prompt)
+            async for line in process.stdout:
+                self._consume_line(state, line)
+                if state.got_result:
+                    # Deliver now; hooks and telemetry flushes finish in the background
+                    return
+            await process.wait()
+            await stderr_task
+
+        stderr_task = None
+        handed_off = False
+        monitor = None
+        resources = None
         try:
-            if self._is_windows:
-                # On Windows, use shell=True to resolve .cmd files from PATH
-                cmd_str = subprocess.list2cmdline(cmd)
-                logger.info(f"Windows command: {cmd_str}")
-                process = await asyncio.create_subprocess_shell(
-                    cmd_str,
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=working_dir,
+            process = await self._acquire(cmd, working_dir)
+            stderr_task = asyncio.create_task(self._drain_stderr(process, capture))
+            monitor = ResourceMonitor(process.pid)
+            monitor.start()
+            await asyncio.wait_for(run(), timeout=self.timeout)
+
+            if capture.total_bytes:
+                logger.warning(f"Claude stderr ({capture.total_bytes} bytes): {capture.tail()}")
+
+            logger.info(f"Claude stdout length: {state.bytes_read}")
+
+            if process.returncode and not state.got_result:
+                result = ClaudeResult(
+                    success=False,
+                    output=state.last_assistant_content,
+                    session_id=state.session_id,
+                    error=self._with_stderr(
+                        f"Claude exited with code {process.returncode}", capture
+                    ),
                 )
             else:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=working_dir,
+                self._schedule_refill(
+                    working_dir, state.session_id or session_id, approval_mode, permission_prompt_config
                 )
-
-            # Pass prompt via stdin
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(input=prompt.encode("utf-8")),
-                timeout=self.timeout,
-            )
-
-            stdout_text = stdout.decode("utf-8", errors="replace")
-            stderr_text = stderr.decode("utf-8", errors="replace")
-
-            if stderr_text:
-                logger.warning(f"Claude stderr: {stderr_text}")
-
-            logger.info(f"Claude stdout length: {len(stdout_text)}")
-
-            return self._parse_output(stdout_text)
+                result = self._finish(state)
+                if process.returncode is None:
+                    self._reap_in_background(process, stderr_task)
+                    handed_off = True
 
         except asyncio.TimeoutError:
-            return ClaudeResult(
+            result = ClaudeResult(
                 success=False,
                 output="",
-                error=f"Command timed out after {self.timeout} seconds",
+                error=self._with_stderr(
+                    f"Command timed out after {self.timeout} seconds", capture
+                ),
             )
         except Exception as e:
-            return ClaudeResult(
+            result = ClaudeResult(
                 success=False,
                 output="",
-                error=str(e),
+                error=self._with_stderr(str(e), capture),
+            )
+        finally:
+            if not handed_off:
+                if stderr_task:
+                    stderr_task.cancel()
+                # Timed out, cancelled (/skip, /cancel) or failed mid-run
+                if process:
+                    self._terminate_in_background(process)
+            if monitor:
+                resources = await monitor.stop()
+
+        result.stderr_bytes = capture.total_bytes
+        result.resources = resources
+        if resources:
+            logger.info(
+                f"Claude run used {resources.wall_time:.1f}s wall, "
+                f"cpu={resources.cpu_user}/{resources.cpu_system}s, max_rss={resources.max_rss}"
             )
+        return result
 
     async def stream(
         self,
@@ -162,156 +533,242 @@ class ClaudeInterface:
         session_id: Optional[str] = None,
         approval_mode: str = "safe",
         allowed_tools: Optional[list[str]] = None,
+        permission_prompt_config: Optional[str] = None,
+        capture: Optional[StderrCapture] = None,
+        on_process: Optional[Callable[[asyncio.subprocess.Process], None]] = None,
     ) -> AsyncIterator[StreamUpdate]:
-        """Stream updates from Claude Code execution."""
+        """Stream updates from Claude Code execution.
+
+        Pass capture to read the run's stderr (tail and byte count) afterwards,
+        and on_process to be handed the CLI process once it is running.
+        """
         cmd = self._build_command(
             session_id=session_id,
             approval_mode=approval_mode,
             allowed_tools=allowed_tools,
+            permission_prompt_config=permission_prompt_config,
         )
 
         logger.info(f"Streaming: {' '.join(cmd)}")
 
+        process = None
+        capture = capture or StderrCapture()
+        stderr_task = None
+        handed_off = False
         try:
-            if self._is_windows:
-                process = await asyncio.create_subprocess_shell(
-                    subprocess.list2cmdline(cmd),
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=working_dir,
-                )
-            else:
-                process = await asyncio.create_subprocess_exec(
-                    *cmd,
-                    stdin=asyncio.subprocess.PIPE,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=working_dir,
-                )
+            process = await self._acquire(cmd, working_dir)
+            stderr_task = asyncio.create_task(self._drain_stderr(process, capture))
+            if on_process:
+                on_process(process)
 
             # Write prompt to stdin and close it
-            process.stdin.write(prompt.encode("utf-8"))
-            await process.stdin.drain()
-            process.stdin.close()
-            await process.stdin.wait_closed()
+            await self._write_prompt(process, prompt)
 
             current_session_id = None
+            got_result = False
 
             async for line in process.stdout:
-                line_text = line.decode("utf-8", errors="replace").strip()
-                if not line_text:
+                event = decode_event(line)
+                if event is None:
+                    line_text = line.decode("utf-8", errors="replace").strip()
+                    if line_text:
+                        # Non-JSON output, yield as raw content
+                        yield StreamUpdate(type="raw", content=line_text)
                     continue
 
-                try:
-                    data = json.loads(line_text)
-                    update = self._parse_stream_line(data)
-                    if update.session_id:
-                        current_session_id = update.session_id
-                    yield update
-                except json.JSONDecodeError:
-                    # Non-JSON output, yield as raw content
-                    yield StreamUpdate(type="raw", content=line_text)
+                update = self._event_to_update(event)
+                if update.session_id:
+                    current_session_id = update.session_id
+                if isinstance(event, ResultEvent):
+                    got_result = True
+                yield update
+                if got_result:
+                    break
+
+            if got_result:
+                # Result delivered; let hooks and telemetry flushes finish in the background
+                self._schedule_refill(
+                    working_dir, current_session_id or session_id, approval_mode, permission_prompt_config
+                )
+                self._reap_in_background(process, stderr_task)
+                handed_off = True
+                return
 
             await process.wait()
+            await stderr_task
+
+            if capture.total_bytes:
+                logger.warning(f"Claude stderr ({capture.total_bytes} bytes): {capture.tail()}")
+
+            if process.returncode:
+                yield StreamUpdate(
+                    type="error",
+                    content=self._with_stderr(
+                        f"Claude exited with code {process.returncode}", capture
+                    ),
+                )
+                return
+
+            self._schedule_refill(
+                working_dir, current_session_id or session_id, approval_mode, permission_prompt_config
+            )
 
         except Exception as e:
-            yield StreamUpdate(type="error", content=str(e))
+            yield StreamUpdate(type="error", content=self._with_stderr(str(e), capture))
+        finally:
+            if not handed_off:
+                if stderr_task:
+                    stderr_task.cancel()
+                # Consumer stopped early or was cancelled - don't leave the CLI running
+                if process:
+                    self._terminate_in_background(process)
+
+    async def execute_streaming(
+        self,
+        prompt: str,
+        working_dir: str,
+        on_update: Callable[[StreamUpdate], Awaitable[None]],
+        session_id: Optional[str] = None,
+        approval_mode: str = "safe",
+        allowed_tools: Optional[list[str]] = None,
+        permission_prompt_config: Optional[str] = None,
+    ) -> ClaudeResult:
+        """Execute via stream(), forwarding each update, and return the full result."""
+        state = _ParseState()
+        capture = StderrCapture()
+        monitor: Optional[ResourceMonitor] = None
+        started = time.monotonic()
+
+        def on_process(process: asyncio.subprocess.Process) -> None:
+            nonlocal monitor
+            monitor = ResourceMonitor(process.pid)
+            monitor.start()
+
+        async def run() -> Optional[str]:
+            async for update in self.stream(
+                prompt=prompt,
+                working_dir=working_dir,
+                session_id=session_id,
+                approval_mode=approval_mode,
+                allowed_tools=allowed_tools,
+                permission_prompt_config=permission_prompt_config,
+                capture=capture,
+                on_process=on_process,
+            ):
+                if update.type == "error":
+                    return update.content
+                if update.event is not None:
+                    self._consume_event(state, update.event)
+                try:
+                    await on_update(update)
+                except Exception as e:
+                    logger.warning(f"Stream update callback failed: {e}")
+            return None
+
+        try:
+            error = await asyncio.wait_for(run(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error = f"Command timed out after {self.timeout} seconds"
+        finally:
+            resources = await monitor.stop() if monitor else None
+
+        if error:
+            result = ClaudeResult(
+                success=False,
+                output="",
+                session_id=state.session_id,
+                error=error,
+            )
+        else:
+            result = self._finish(state)
+        result.stderr_bytes = capture.total_bytes
+        # No process if spawning failed; wall time is still worth recording
+        result.resources = resources or ResourceUsage(wall_time=time.monotonic() - started)
+        return result
 
     def _parse_stream_line(self, data: dict) -> StreamUpdate:
-        """Parse a single JSON line from stream output."""
-        msg_type = data.get("type", "unknown")
-        session_id = data.get("session_id")
+        """Parse a single decoded JSON line from stream output."""
+        return self._event_to_update(event_from_dict(data))
 
-        if msg_type == "system":
-            subtype = data.get("subtype", "")
+    def _event_to_update(self, event: StreamEvent) -> StreamUpdate:
+        """Convert a typed stream event into a StreamUpdate."""
+        if isinstance(event, SystemEvent):
             return StreamUpdate(
-                type="init" if subtype == "init" else "system",
-                content=f"[{subtype}]",
-                session_id=session_id,
-                raw_data=data,
+                type="init" if event.subtype == "init" else "system",
+                content=f"[{event.subtype}]",
+                session_id=event.session_id,
+                event=event,
             )
 
-        elif msg_type == "assistant":
-            content = self._extract_assistant_content(data)
+        elif isinstance(event, AssistantEvent):
             return StreamUpdate(
                 type="assistant",
-                content=content,
-                session_id=session_id,
-                raw_data=data,
+                content=event.content,
+                session_id=event.session_id,
+                event=event,
             )
 
-        elif msg_type == "result":
-            result_text = data.get("result", "")
+        elif isinstance(event, ResultEvent):
             return StreamUpdate(
                 type="result",
-                content=result_text,
-                session_id=session_id,
-                raw_data=data,
+                content=event.result,
+                session_id=event.session_id,
+                event=event,
             )
 
         else:
             return StreamUpdate(
-                type=msg_type,
-                content=str(data),
-                session_id=session_id,
-                raw_data=data,
+                type=event.type,
+                content=f"[{event.type}]",
+                session_id=event.session_id,
+                event=event,
             )
 
-    def _extract_assistant_content(self, data: dict) -> str:
-        """Extract text content from assistant message."""
-        message = data.get("message", {})
-        content_blocks = message.get("content", [])
-
-        text_parts = []
-        for block in content_blocks:
-            if isinstance(block, dict):
-                if block.get("type") == "text":
-                    text_parts.append(block.get("text", ""))
-                elif block.get("type") == "tool_use":
-                    tool_name = block.get("name", "unknown")
-                    text_parts.append(f"[Using tool: {tool_name}]")
-
-        return "\n".join(text_parts)
-
-    def _parse_output(self, output: str) -> ClaudeResult:
-        """Parse complete Claude output into result."""
-        lines = output.strip().split("\n")
-
-        session_id = None
-        result_text = ""
-        permission_denials = []
-        last_assistant_content = ""
-
-        for line in lines:
-            if not line.strip():
-                continue
-
-            try:
-                data = json.loads(line)
-                msg_type = data.get("type")
-
-                # Extract session ID from any message
-                if "session_id" in data:
-                    session_id = data["session_id"]
-
-                if msg_type == "assistant":
-                    last_assistant_content = self._extract_assistant_content(data)
-
-                elif msg_type == "result":
-                    result_text = data.get("result", "")
-                    permission_denials = data.get("permission_denials", [])
-
-            except json.JSONDecodeError:
-                # Non-JSON line, might be an error
-                continue
-
+    def _consume_line(self, state: _ParseState, line: str | bytes) -> None:
+        """Fold a single stream-json line into the running parse state."""
+        state.bytes_read += len(line)
+        event = decode_event(line)
+        if event is not None:
+            self._consume_event(state, event)
+
+    def _consume_event(self, state: _ParseState, event: StreamEvent) -> None:
+        """Fold a typed stream event into the running parse state."""
+        # Extract session ID from any message
+        if event.session_id is not None:
+            state.session_id = event.session_id
+
+        if isinstance(event, AssistantEvent):
+            state.last_assistant_content = event.content
+
+        elif isinstance(event, ResultEvent):
+            state.result_text = event.result
+            state.permission_denials = event.permission_denials
+            state.usage = event.usage
+            state.got_result = True
+            state.result_at = time.monotonic()
+
+    def _finish(self, state: _ParseState) -> ClaudeResult:
+        """Build the final result from accumulated parse state."""
         # Use result text if available, otherwise last assistant content
-        final_output = result_text or last_assistant_content
+        final_output = state.result_text or state.last_assistant_content
 
         return ClaudeResult(
             success=True,
             output=final_output,
-            session_id=session_id,
-            permission_denials=permission_denials,
+            session_id=state.session_id,
+            permission_denials=state.permission_denials,
+            usage=state.usage,
+            result_at=state.result_at,
         )
+
+    def _parse_output(self, output: str) -> ClaudeResult:
+        """Parse complete Claude output into result."""
+        state = _ParseState()
+        # Slice one line at a time; iterating a StringIO would copy the transcript
+        start, size = 0, len(output)
+        while start < size:
+            end = output.find("\n", start)
+            end = size if end == -1 else end + 1
+            self._consume_line(state, output[start:end])
+            start = end
+        return self._finish(state)
@@ -0,0 +1,209 @@
+"""Global concurrency limit for Claude Code Telegram Bridge.
+
+Each project has its own queue and runs one task at a time (or one per
+worktree), but without a global budget every active project runs a claude
+process at once. The limiter caps the number of runs in flight and hands
+free slots to waiting projects by weighted fair queuing (start-time fair
+queuing): a project is charged for the time it held a slot, divided by
+its weight, and the waiter with the smallest virtual start time goes next.
+Projects that keep the box busy therefore yield to ones that have barely
+run.
+
+Fairness applies within a priority class. Interactive work is admitted
+before scheduled and batch work, and waiting work is promoted one class
+per aging interval so it is never starved.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from .metrics import Metrics
+from .priority import DEFAULT_AGING_INTERVAL, DEFAULT_PRIORITY, priority_rank
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds charged per run, so instant failures still cost something
+MIN_CHARGE = 1.0
+
+
+@dataclass
+class LimiterStats:
+    """Snapshot of the limiter state."""
+    max_concurrent: int
+    running: int
+    waiting: int
+    running_by_project: dict[str, int]
+
+
+@dataclass
+class _Waiter:
+    """A run waiting for a slot."""
+    tag: float
+    sequence: int
+    project_name: str
+    priority: str
+    enqueued_at: float
+    future: asyncio.Future
+
+
+class FairShareLimiter:
+    """Caps concurrent claude runs and shares slots fairly between projects."""
+
+    def __init__(
+        self,
+        max_concurrent: int = 0,
+        weights: Optional[dict[str, float]] = None,
+        aging_interval: float = DEFAULT_AGING_INTERVAL,
+        metrics: Optional[Metrics] = None,
+    ):
+        """Create a limiter.
+
+        Args:
+            max_concurrent: Runs allowed at once across all projects (0 = unlimited)
+            weights: Relative share per project (default 1.0)
+            aging_interval: Seconds of waiting that promote work by one priority class
+            metrics: Where to record slot wait times, if set
+        """
+        self.max_concurrent = max_concurrent
+        self.aging_interval = aging_interval
+        self.metrics = metrics
+        self._weights = dict(weights or {})
+        self._running: dict[str, int] = {}
+        self._finish_tags: dict[str, float] = {}
+        self._virtual_time = 0.0
+        # Few enough (at most one per project) to scan on each dispatch
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+
+    @property
+    def running(self) -> int:
+        """Number of runs currently holding a slot."""
+        return sum(self._running.values())
+
+    def set_weight(self, project_name: str, weight: float) -> None:
+        """Set the relative share of a project."""
+        self._weights[project_name] = weight
+
+    def _weight(self, project_name: str) -> float:
+        """Get a project's weight, guarding against zero or negative values."""
+        return max(self._weights.get(project_name, 1.0), 0.01)
+
+    def _has_capacity(self) -> bool:
+        """Check if another run may start now."""
+        return self.max_concurrent <= 0 or self.running < self.max_concurrent
+
+    def _admit(self, project_name: str, tag: float) -> None:
+        """Count a run as started."""
+        self._running[project_name] = self._running.get(project_name, 0) + 1
+        self._virtual_time = max(self._virtual_time, tag)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the most urgent waiters, smallest start tag first."""
+        while self._waiters and self._has_capacity():
+            now = time.monotonic()
+            waiter = min(
+                self._waiters,
+                key=lambda w: (
+                    priority_rank(w.priority, now - w.enqueued_at, self.aging_interval),
+                    w.tag,
+                    w.sequence,
+                ),
+            )
+            self._waiters.remove(waiter)
+            self._admit(waiter.project_name, waiter.tag)
+            waiter.future.set_result(None)
+
+    async def acquire(
+        self,
+        project_name: str,
+        priority: str = DEFAULT_PRIORITY,
+        enqueued_at: Optional[float] = None,
+    ) -> float:
+        """Wait for a slot.
+
+        Args:
+            project_name: Project the run belongs to
+            priority: Priority class of the run
+            enqueued_at: time.monotonic() when the work was queued, for aging
+
+        Returns:
+            The run's virtual start tag, to be passed back to release()
+        """
+        tag = max(self._virtual_time, self._finish_tags.get(project_name, 0.0))
+        if self._has_capacity() and not self._waiters:
+            self._admit(project_name, tag)
+            return tag
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(
+            tag=tag,
+            sequence=next(self._sequence),
+            project_name=project_name,
+            priority=priority,
+            enqueued_at=enqueued_at if enqueued_at is not None else time.monotonic(),
+            future=future,
+        )
+        self._waiters.append(waiter)
+        logger.info(
+            f"#{project_name} waiting for a run slot "
+            f"({self.running}/{self.max_concurrent} busy, {len(self._waiters)} waiting)"
+        )
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled; give the slot back
+                self.release(project_name, tag, 0.0)
+            else:
+                self._waiters.remove(waiter)
+            raise
+        return tag
+
+    def release(self, project_name: str, tag: float, service_time: float) -> None:
+        """Free a slot and charge the project for the time it was held."""
+        self._running[project_name] -= 1
+        if not self._running[project_name]:
+            del self._running[project_name]
+
+        charge = max(service_time, MIN_CHARGE) / self._weight(project_name)
+        self._finish_tags[project_name] = max(self._finish_tags.get(project_name, 0.0), tag + charge)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        project_name: str,
+        priority: str = DEFAULT_PRIORITY,
+        enqueued_at: Optional[float] = None,
+    ) -> AsyncIterator[None]:
+        """Hold a run slot for the duration of the block.
+
+        A block that completes is recorded as service time; cancelled or
+        failed runs (including expired tasks) are not.
+        """
+        requested = time.monotonic()
+        tag = await self.acquire(project_name, priority, enqueued_at)
+        started = time.monotonic()
+        if self.metrics:
+            self.metrics.record("slot_wait", project_name, started - requested)
+        try:
+            yield
+        finally:
+            service_time = time.monotonic() - started
+            self.release(project_name, tag, service_time)
+        if self.metrics:
+            self.metrics.record("service", project_name, service_time)
+
+    def get_stats(self) -> LimiterStats:
+        """Get current slot usage."""
+        return LimiterStats(
+            max_concurrent=self.max_concurrent,
+            running=self.running,
+            waiting=len(self._waiters),
+            running_by_project=dict(self._running),
+        )
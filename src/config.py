@@ -18,6 +18,9 @@ class ProjectConfig:
     """Per-project configuration."""
     path: str
     approval_mode: str = "safe"  # safe, ask-all, auto-all
+    weight: float = 1.0  # Share of run slots when projects compete
+    worktrees: int = 0  # Git worktrees for parallel tasks, 0 = run in path one at a time
+    task_ttl: float = 0.0  # Seconds a task may wait before it is dropped, 0 = forever
 
 
 @dataclass
@@ -25,6 +28,24 @@ class ClaudeCodeConfig:
     """Claude Code CLI configuration."""
     executable: str = "claude"
     default_approval_mode: str = "safe"
+    live_progress: bool = False  # Edit a status message while tasks run
+    progress_interval: float = 3.0  # Min seconds between progress edits
+    persistent_sessions: bool = False  # Keep one claude process per session
+    session_idle_timeout: int = 600  # Seconds before an idle process is closed
+    warm_pool_size: int = 0  # Pre-spawned processes per working directory
+    permission_server: bool = False  # Answer permission prompts mid-run
+
+
+@dataclass
+class QueueConfig:
+    """Task queue configuration."""
+    max_concurrent: int = 0  # Claude runs across all projects, 0 = unlimited
+    priority_aging: float = 300.0  # Seconds of waiting that promote a task one priority class
+    coalesce_window: float = 0.0  # Seconds to gather follow-ups into one run, 0 = off
+    durable: bool = True  # Keep queued tasks in SQLite so they survive restarts
+    max_depth: int = 0  # Queued tasks allowed per project, 0 = unlimited
+    max_total_depth: int = 0  # Queued tasks allowed across all projects, 0 = unlimited
+    suppress_duplicates: bool = True  # Reject a prompt already queued for the project
 
 
 @dataclass
@@ -41,6 +62,7 @@ class Config:
     default_project: Optional[str] = None
     claude_code: ClaudeCodeConfig = field(default_factory=ClaudeCodeConfig)
     sessions: SessionsConfig = field(default_factory=SessionsConfig)
+    queue: QueueConfig = field(default_factory=QueueConfig)
     outputs_path: str = "./outputs"
     _config_path: Optional[Path] = field(default=None, repr=False)
 
@@ -61,12 +83,21 @@ class Config:
             projects[name] = ProjectConfig(
                 path=proj_data["path"],
                 approval_mode=proj_data.get("approval_mode", "safe"),
+                weight=proj_data.get("weight", 1.0),
+                worktrees=proj_data.get("worktrees", 0),
+                task_ttl=proj_data.get("task_ttl", 0.0),
             )
 
         claude_data = data.get("claude_code", {})
         claude_code = ClaudeCodeConfig(
             executable=claude_data.get("executable", "claude"),
             default_approval_mode=claude_data.get("default_approval_mode", "safe"),
+            live_progress=claude_data.get("live_progress", False),
+            progress_interval=claude_data.get("progress_interval", 3.0),
+            persistent_sessions=claude_data.get("persistent_sessions", False),
+            session_idle_timeout=claude_data.get("session_idle_timeout", 600),
+            warm_pool_size=claude_data.get("warm_pool_size", 0),
+            permission_server=claude_data.get("permission_server", False),
         )
 
         sessions_data = data.get("sessions", {})
@@ -74,12 +105,24 @@ class Config:
             storage_path=sessions_data.get("storage_path", "./sessions"),
         )
 
+        queue_data = data.get("queue", {})
+        queue = QueueConfig(
+            max_concurrent=queue_data.get("max_concurrent", 0),
+            priority_aging=queue_data.get("priority_aging", 300.0),
+            coalesce_window=queue_data.get("coalesce_window", 0.0),
+            durable=queue_data.get("durable", True),
+            max_depth=queue_data.get("max_depth", 0),
+            max_total_depth=queue_data.get("max_total_depth", 0),
+            suppress_duplicates=queue_data.get("suppress_duplicates", True),
+        )
+
         config = cls(
             telegram=telegram,
             projects=projects,
             default_project=data.get("default_project"),
             claude_code=claude_code,
             sessions=sessions,
+            queue=queue,
             outputs_path=data.get("outputs_path", "./outputs"),
             _config_path=config_path,
         )
@@ -105,16 +148,34 @@ class Config:
                 name: {
                     "path": proj.path,
                     "approval_mode": proj.approval_mode,
+                    "weight": proj.weight,
+                    "worktrees": proj.worktrees,
+                    "task_ttl": proj.task_ttl,
                 }
                 for name, proj in self.projects.items()
             },
             "claude_code": {
                 "executable": self.claude_code.executable,
                 "default_approval_mode": self.claude_code.default_approval_mode,
+                "live_progress": self.claude_code.live_progress,
+                "progress_interval": self.claude_code.progress_interval,
+                "persistent_sessions": self.claude_code.persistent_sessions,
+                "session_idle_timeout": self.claude_code.session_idle_timeout,
+                "warm_pool_size": self.claude_code.warm_pool_size,
+                "permission_server": self.claude_code.permission_server,
             },
             "sessions": {
                 "storage_path": self.sessions.storage_path,
             },
+            "queue": {
+                "max_concurrent": self.queue.max_concurrent,
+                "priority_aging": self.queue.priority_aging,
+                "coalesce_window": self.queue.coalesce_window,
+                "durable": self.queue.durable,
+                "max_depth": self.queue.max_depth,
+                "max_total_depth": self.queue.max_total_depth,
+                "suppress_duplicates": self.queue.suppress_duplicates,
+            },
             "outputs_path": self.outputs_path,
         }
 
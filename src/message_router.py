@@ -14,6 +14,7 @@ class ParsedMessage:
     project_config: ProjectConfig
     task: str
     image_paths: list[str]
+    ttl: Optional[float] = None  # Seconds from a ttl:30m prefix
 
 
 class MessageRouter:
@@ -22,6 +23,10 @@ class MessageRouter:
     # Match #projectname at the start of message
     PROJECT_PATTERN = re.compile(r"^#(\w+)\s+(.+)$", re.DOTALL)
 
+    # Match ttl:30m (s, m, h or d) at the start of the task
+    TTL_PATTERN = re.compile(r"^ttl:(\d+(?:\.\d+)?)([smhd])\s+(.+)$", re.DOTALL | re.IGNORECASE)
+    TTL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
     def __init__(self, config: Config):
         self.config = config
 
@@ -64,6 +69,13 @@ class MessageRouter:
             if last_project and last_project in self.config.projects:
                 project_name = last_project
 
+        # Optional expiry: drop the task if it has not started within the TTL
+        ttl = None
+        ttl_match = self.TTL_PATTERN.match(task)
+        if ttl_match:
+            ttl = float(ttl_match.group(1)) * self.TTL_UNITS[ttl_match.group(2).lower()]
+            task = ttl_match.group(3).strip()
+
         # Resolve project (may raise ValueError)
         resolved_name, project_config = self.config.get_project(project_name)
 
@@ -72,6 +84,7 @@ class MessageRouter:
             project_config=project_config,
             task=task,
             image_paths=image_paths,
+            ttl=ttl,
         )
 
     def get_project_list(self) -> list[tuple[str, str, str]]:
@@ -0,0 +1,176 @@
+"""Runtime latency metrics for Claude Code Telegram Bridge.
+
+Latencies are kept in rolling histograms: log-spaced buckets, split into
+time slots that expire one by one, so memory stays constant however many
+samples arrive and percentiles always reflect the recent window.
+"""
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+# Rolling window covered by each histogram, and the number of slots it is split into
+WINDOW_SECONDS = 3600.0
+WINDOW_SLOTS = 12
+
+# Buckets span 1 ms to ~28 h, 20 per decade (~12% relative error)
+MIN_LATENCY = 0.001
+BUCKETS_PER_DECADE = 20
+BUCKET_COUNT = 8 * BUCKETS_PER_DECADE
+
+# Display names for known metrics
+METRIC_LABELS = {
+    "queue_wait": "Queue wait",
+    "slot_wait": "Run slot wait",
+    "service": "Service time",
+    "result_to_send": "Result to send",
+    "expired_wait": "Expired after",
+}
+
+
+@dataclass
+class LatencySummary:
+    """Summary of one metric for one project over the rolling window."""
+    count: int  # Samples in the window
+    total: int  # Samples since start
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class RollingHistogram:
+    """Log-bucketed latency histogram over a rolling time window."""
+
+    def __init__(self, window: float = WINDOW_SECONDS, slots: int = WINDOW_SLOTS):
+        self.slot_length = window / slots
+        self.total = 0
+        self._slots: list[list[int]] = [[0] * BUCKET_COUNT for _ in range(slots)]
+        self._slot_ids: list[int] = [-1] * slots
+        # Per-slot (sum, max) for mean and exact max
+        self._sums: list[float] = [0.0] * slots
+        self._maxes: list[float] = [0.0] * slots
+
+    def _current_slot(self, now: float) -> int:
+        """Get the slot index for now, clearing it if it held an expired period."""
+        slot_id = int(now // self.slot_length)
+        index = slot_id % len(self._slots)
+        if self._slot_ids[index] != slot_id:
+            self._slot_ids[index] = slot_id
+            self._slots[index] = [0] * BUCKET_COUNT
+            self._sums[index] = 0.0
+            self._maxes[index] = 0.0
+        return index
+
+    def record(self, seconds: float, now: Optional[float] = None) -> None:
+        """Add one sample."""
+        index = self._current_slot(now if now is not None else time.monotonic())
+        self._slots[index][_bucket(seconds)] += 1
+        self._sums[index] += seconds
+        self._maxes[index] = max(self._maxes[index], seconds)
+        self.total += 1
+
+    def summary(self, now: Optional[float] = None) -> Optional[LatencySummary]:
+        """Summarise the window, or None if it holds no samples."""
+        now = now if now is not None else time.monotonic()
+        oldest = int(now // self.slot_length) - len(self._slots) + 1
+
+        counts = [0] * BUCKET_COUNT
+        total_sum = 0.0
+        max_value = 0.0
+        for index, slot_id in enumerate(self._slot_ids):
+            if slot_id < oldest:
+                continue
+            for bucket, count in enumerate(self._slots[index]):
+                counts[bucket] += count
+            total_sum += self._sums[index]
+            max_value = max(max_value, self._maxes[index])
+
+        count = sum(counts)
+        if not count:
+            return None
+        return LatencySummary(
+            count=count,
+            total=self.total,
+            mean=total_sum / count,
+            p50=min(_percentile(counts, count, 50), max_value),
+            p95=min(_percentile(counts, count, 95), max_value),
+            p99=min(_percentile(counts, count, 99), max_value),
+            max=max_value,
+        )
+
+
+class Metrics:
+    """Latency metrics keyed by metric name and project."""
+
+    def __init__(self):
+        self._histograms: dict[str, dict[str, RollingHistogram]] = {}
+
+    def record(self, metric: str, project_name: str, seconds: float) -> None:
+        """Record one latency sample."""
+        projects = self._histograms.setdefault(metric, {})
+        projects.setdefault(project_name, RollingHistogram()).record(max(0.0, seconds))
+
+    def get_summary(self, metric: str) -> dict[str, LatencySummary]:
+        """Get the summary of a metric for each project."""
+        summaries = {}
+        for project, histogram in self._histograms.get(metric, {}).items():
+            summary = histogram.summary()
+            if summary:
+                summaries[project] = summary
+        return summaries
+
+    def get_all(self) -> dict[str, dict[str, LatencySummary]]:
+        """Get summaries of every metric, keyed by metric then project."""
+        return {metric: self.get_summary(metric) for metric in self._histograms}
+
+    def format_summary(self) -> str:
+        """Format all metrics for a Telegram message."""
+        sections = []
+        for metric, summaries in self.get_all().items():
+            if not summaries:
+                continue
+            lines = [f"{METRIC_LABELS.get(metric, metric)}:"]
+            for project, s in sorted(summaries.items()):
+                lines.append(
+                    f"  #{project} - n={s.count} p50 {_ms(s.p50)} "
+                    f"p95 {_ms(s.p95)} p99 {_ms(s.p99)} max {_ms(s.max)}"
+                )
+            sections.append("\n".join(lines))
+
+        if not sections:
+            return "No metrics recorded in the last hour."
+        return "\n\n".join(sections)
+
+
+def _bucket(seconds: float) -> int:
+    """Get the histogram bucket for a latency."""
+    if seconds <= MIN_LATENCY:
+        return 0
+    index = int(math.log10(seconds / MIN_LATENCY) * BUCKETS_PER_DECADE) + 1
+    return min(index, BUCKET_COUNT - 1)
+
+
+def _bucket_upper(index: int) -> float:
+    """Get the upper bound of a histogram bucket."""
+    return MIN_LATENCY * 10 ** (index / BUCKETS_PER_DECADE)
+
+
+def _percentile(counts: list[int], total: int, pct: float) -> float:
+    """Nearest-rank percentile from bucket counts, as a bucket upper bound."""
+    rank = max(1, math.ceil(pct / 100 * total))
+    seen = 0
+    for index, count in enumerate(counts):
+        seen += count
+        if seen >= rank:
+            return _bucket_upper(index)
+    return _bucket_upper(len(counts) - 1)
+
+
+def _ms(seconds: float) -> str:
+    """Format seconds as milliseconds, or seconds once large."""
+    if seconds >= 10:
+        return f"{seconds:.1f}s"
+    return f"{seconds * 1000:.0f}ms"
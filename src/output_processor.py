@@ -92,10 +92,18 @@ class OutputProcessor:
 
         return summary
 
-    def format_queue_position(self, position: int, project_name: str) -> str:
-        """Format queue position message."""
+    def format_queue_position(
+        self,
+        position: int,
+        project_name: str,
+        task_id: Optional[int] = None,
+    ) -> str:
+        """Format queue position message, with the task ID for /cancel and /bump."""
         if position == 0:
-            return f"Processing task for #{project_name}..."
+            text = f"Processing task for #{project_name}..."
+            return f"{text} (task {task_id})" if task_id is not None else text
+        if task_id is not None:
+            return f"Queued for #{project_name} (position {position}, task {task_id})"
         return f"Queued for #{project_name} (position {position})"
 
     def format_permission_request(
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Stdio MCP server used as Claude Code's --permission-prompt-tool.
+
+Launched by the Claude CLI from the config written by PermissionServer.
+Each tools/call is forwarded to the bridge over localhost and blocks until
+the user answers in Telegram. Standard library only, since it runs under
+whatever interpreter started the bridge, outside the package.
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+TOOL_NAME = "approve"
+DEFAULT_PROTOCOL_VERSION = "2024-11-05"
+
+
+def ask_bridge(port: int, token: str, tool_name: str, tool_input: dict) -> bool:
+    """Forward one permission request to the bridge and wait for the answer."""
+    request = {"token": token, "tool_name": tool_name, "input": tool_input}
+    try:
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            with sock.makefile("r", encoding="utf-8") as f:
+                reply = json.loads(f.readline() or "{}")
+    except (OSError, json.JSONDecodeError):
+        return False
+    return reply.get("approved") is True
+
+
+def handle(message: dict, port: int, token: str) -> dict | None:
+    """Handle one JSON-RPC message. Returns the response, or None for notifications."""
+    method = message.get("method")
+    msg_id = message.get("id")
+    params = message.get("params") or {}
+
+    if msg_id is None:
+        return None
+
+    if method == "initialize":
+        result = {
+            "protocolVersion": params.get("protocolVersion", DEFAULT_PROTOCOL_VERSION),
+            "capabilities": {"tools": {}},
+            "serverInfo": {"name": "telegram-bridge-approvals", "version": "1.0"},
+        }
+    elif method == "ping":
+        result = {}
+    elif method == "tools/list":
+        result = {
+            "tools": [
+                {
+                    "name": TOOL_NAME,
+                    "description": "Ask the bridge user to approve a tool call via Telegram",
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "tool_name": {"type": "string"},
+                            "input": {"type": "object"},
+                            "tool_use_id": {"type": "string"},
+                        },
+                        "required": ["tool_name", "input"],
+                    },
+                }
+            ]
+        }
+    elif method == "tools/call":
+        arguments = params.get("arguments") or {}
+        tool_name = arguments.get("tool_name", "unknown")
+        tool_input = arguments.get("input") or {}
+
+        if ask_bridge(port, token, tool_name, tool_input):
+            decision = {"behavior": "allow", "updatedInput": tool_input}
+        else:
+            decision = {"behavior": "deny", "message": "Denied by user via Telegram"}
+
+        result = {"content": [{"type": "text", "text": json.dumps(decision)}]}
+    else:
+        return {
+            "jsonrpc": "2.0",
+            "id": msg_id,
+            "error": {"code": -32601, "message": f"Method not found: {method}"},
+        }
+
+    return {"jsonrpc": "2.0", "id": msg_id, "result": result}
+
+
+def main() -> None:
+    """Serve JSON-RPC messages on stdin/stdout until EOF."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--token", required=True)
+    args = parser.parse_args()
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            message = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+        response = handle(message, args.port, args.token)
+        if response is not None:
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Local permission-prompt server for Claude Code Telegram Bridge.
+
+Claude Code can delegate permission checks to an MCP tool
+(``--permission-prompt-tool``). The bridge points it at a small stdio MCP
+server (``permission_prompt_mcp.py``) which forwards each request over
+localhost to this server. The request is answered through Telegram while
+the run stays paused, so approving a tool no longer means re-running the
+whole prompt.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Name of the MCP server/tool as seen by the Claude CLI
+MCP_SERVER_NAME = "bridge"
+MCP_TOOL_NAME = "approve"
+PERMISSION_PROMPT_TOOL = f"mcp__{MCP_SERVER_NAME}__{MCP_TOOL_NAME}"
+
+ApprovalCallback = Callable[[str, dict], Awaitable[bool]]
+
+
+class PermissionServer:
+    """Answers permission prompts from running claude processes."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.Server] = None
+        self._tokens: dict[str, str] = {}  # key -> token
+        self._handlers: dict[str, ApprovalCallback] = {}  # token -> callback
+        # Private (0700) directory for the MCP configs, created on start
+        self._config_dir: Optional[Path] = None
+
+    async def start(self) -> None:
+        """Start listening on localhost."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        # The configs name the command claude launches and hold the tokens, so
+        # they live in a fresh directory only this user can enter
+        self._config_dir = Path(tempfile.mkdtemp(prefix="claude_bridge_"))
+        logger.info(f"Permission server listening on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._config_dir:
+            shutil.rmtree(self._config_dir, ignore_errors=True)
+            self._config_dir = None
+
+    def register(self, key: str, callback: ApprovalCallback) -> str:
+        """Route prompts for key to callback.
+
+        Returns:
+            Path to an MCP config file to pass to the Claude CLI. The path is
+            stable per key so long-lived processes can be reused.
+        """
+        if self._server is None or self._config_dir is None:
+            raise RuntimeError("Permission server is not running")
+
+        token = self._tokens.get(key)
+        if token is None:
+            token = secrets.token_urlsafe(16)
+            self._tokens[key] = token
+        self._handlers[token] = callback
+        return str(self._write_config(key, token))
+
+    def unregister(self, key: str) -> None:
+        """Stop routing prompts for key. Further prompts are denied."""
+        token = self._tokens.get(key)
+        if token:
+            self._handlers.pop(token, None)
+
+    def _write_config(self, key: str, token: str) -> Path:
+        """Write the MCP config that launches the stdio shim for this token."""
+        safe_key = "".join(c if c.isalnum() else "_" for c in key)
+        config_path = self._config_dir / f"mcp_{safe_key}.json"
+
+        shim = Path(__file__).parent / "permission_prompt_mcp.py"
+        config = {
+            "mcpServers": {
+                MCP_SERVER_NAME: {
+                    "command": sys.executable,
+                    "args": [str(shim), "--port", str(self.port), "--token", token],
+                }
+            }
+        }
+        # Owner-only from creation, then swapped in atomically
+        tmp_path = config_path.with_suffix(".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(config, f)
+        os.replace(tmp_path, config_path)
+        return config_path
+
+    async def _handle_client(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Answer a single permission request from the stdio shim."""
+        approved = False
+        try:
+            line = await reader.readline()
+            request = json.loads(line)
+            callback = self._handlers.get(request.get("token", ""))
+
+            if callback is None:
+                logger.warning("Permission prompt with unknown or inactive token, denying")
+            else:
+                tool_name = request.get("tool_name", "unknown")
+                tool_input = request.get("input") or {}
+                try:
+                    approved = await callback(tool_name, tool_input)
+                except Exception as e:
+                    logger.error(f"Permission callback failed for {tool_name}: {e}")
+
+            writer.write((json.dumps({"approved": approved}) + "\n").encode("utf-8"))
+            await writer.drain()
+        except (json.JSONDecodeError, ConnectionError) as e:
+            logger.warning(f"Bad permission request: {e}")
+        finally:
+            writer.close()
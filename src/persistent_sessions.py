@@ -0,0 +1,281 @@
+"""Long-lived Claude Code processes for Claude Code Telegram Bridge."""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Optional
+
+from .claude_interface import (
+    ClaudeInterface,
+    ClaudeResult,
+    StderrCapture,
+    StreamUpdate,
+    _ParseState,
+)
+from .resource_monitor import ResourceMonitor
+from .stream_events import decode_event
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentSession:
+    """A single claude process fed prompts over stdin in stream-json mode."""
+
+    def __init__(
+        self,
+        claude: ClaudeInterface,
+        working_dir: str,
+        session_id: Optional[str],
+        options: dict,
+    ):
+        self.claude = claude
+        self.options = options  # _build_command flags other than session_id
+        self.working_dir = working_dir
+        self.session_id = session_id
+        self.resume_id = session_id
+        self.lock = asyncio.Lock()
+        self.last_used = 0.0
+        self._process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._stderr = StderrCapture()
+
+    @property
+    def is_alive(self) -> bool:
+        """Check if the underlying process is still running."""
+        return self._process is not None and self._process.returncode is None
+
+    def matches(
+        self,
+        working_dir: str,
+        session_id: Optional[str],
+        options: dict,
+    ) -> bool:
+        """Check if this process can serve a request with the given settings."""
+        # None means "fresh session", which only a brand-new process satisfies
+        same_session = session_id == self.session_id or (
+            session_id is not None and session_id == self.resume_id
+        )
+        return (
+            self.is_alive
+            and same_session
+            and self.working_dir == working_dir
+            and self.options == options
+        )
+
+    async def start(self) -> None:
+        """Spawn the claude process, resuming session_id if set."""
+        self.resume_id = self.session_id
+        cmd = self.claude._build_command(
+            session_id=self.session_id,
+            stream_input=True,
+            **self.options,
+        )
+        logger.info(f"Starting persistent session: {' '.join(cmd)}")
+        self._process = await self.claude._spawn(cmd, self.working_dir)
+        # Drain stderr so the pipe never fills up while the process idles
+        self._stderr = StderrCapture()
+        self._stderr_task = asyncio.create_task(
+            self.claude._drain_stderr(self._process, self._stderr)
+        )
+        self.last_used = asyncio.get_running_loop().time()
+
+    async def send(
+        self,
+        prompt: str,
+        on_update: Optional[Callable[[StreamUpdate], Awaitable[None]]] = None,
+    ) -> ClaudeResult:
+        """Send one prompt and read output until its result event."""
+        message = {
+            "type": "user",
+            "message": {"role": "user", "content": prompt},
+        }
+        self._process.stdin.write((json.dumps(message) + "\n").encode("utf-8"))
+        await self._process.stdin.drain()
+
+        state = _ParseState()
+        # The process outlives the turn, so stderr and resources are deltas
+        stderr_start = self._stderr.total_bytes
+        monitor = ResourceMonitor(self._process.pid)
+        monitor.start()
+        try:
+            await asyncio.wait_for(
+                self._read_turn(state, on_update),
+                timeout=self.claude.timeout,
+            )
+        except asyncio.CancelledError:
+            # Run was cancelled (/skip, /cancel); stop it without waiting and
+            # detach it so the next execute() spawns a fresh process
+            process, self._process = self._process, None
+            self.claude._terminate_in_background(process)
+            if self._stderr_task:
+                self._stderr_task.cancel()
+                self._stderr_task = None
+            await monitor.stop()
+            raise
+        except asyncio.TimeoutError:
+            # Turn state is unknown, so the process can't be reused
+            resources = await monitor.stop()
+            await self.close()
+            return ClaudeResult(
+                success=False,
+                output="",
+                session_id=state.session_id,
+                error=self.claude._with_stderr(
+                    f"Command timed out after {self.claude.timeout} seconds", self._stderr
+                ),
+                stderr_bytes=self._stderr.total_bytes - stderr_start,
+                resources=resources,
+            )
+
+        resources = await monitor.stop()
+        self.last_used = asyncio.get_running_loop().time()
+
+        if not state.got_result:
+            await self.close()
+            return ClaudeResult(
+                success=False,
+                output=state.last_assistant_content,
+                session_id=state.session_id,
+                error=self.claude._with_stderr(
+                    f"Claude process exited (code {self._process.returncode})", self._stderr
+                ),
+                stderr_bytes=self._stderr.total_bytes - stderr_start,
+                resources=resources,
+            )
+
+        if state.session_id:
+            self.session_id = state.session_id
+        result = self.claude._finish(state)
+        result.stderr_bytes = self._stderr.total_bytes - stderr_start
+        result.resources = resources
+        return result
+
+    async def _read_turn(
+        self,
+        state: _ParseState,
+        on_update: Optional[Callable[[StreamUpdate], Awaitable[None]]],
+    ) -> None:
+        """Consume stdout lines until the result event or EOF."""
+        while not state.got_result:
+            line = await self._process.stdout.readline()
+            if not line:
+                return
+
+            event = decode_event(line)
+            if event is None:
+                continue
+
+            self.claude._consume_event(state, event)
+            if on_update:
+                try:
+                    await on_update(self.claude._event_to_update(event))
+                except Exception as e:
+                    logger.warning(f"Stream update callback failed: {e}")
+
+    async def close(self) -> None:
+        """Close stdin and wait for the process to exit."""
+        process = self._process
+        if process is None:
+            return
+
+        if process.returncode is None:
+            try:
+                process.stdin.close()
+                await asyncio.wait_for(process.wait(), timeout=10)
+            except (asyncio.TimeoutError, ConnectionError):
+                await self.claude.terminate_process(process)
+
+        if self._stderr_task:
+            self._stderr_task.cancel()
+            self._stderr_task = None
+
+
+class PersistentSessionManager:
+    """Keeps one claude process per project or attached session.
+
+    Processes are reused for consecutive prompts with the same settings and
+    shut down after ``idle_timeout`` seconds without use.
+    """
+
+    def __init__(self, claude: ClaudeInterface, idle_timeout: float = 600.0):
+        self.claude = claude
+        self.idle_timeout = idle_timeout
+        self._sessions: dict[str, PersistentSession] = {}
+        self._reaper_task: Optional[asyncio.Task] = None
+
+    async def execute(
+        self,
+        key: str,
+        prompt: str,
+        working_dir: str,
+        session_id: Optional[str] = None,
+        approval_mode: str = "safe",
+        allowed_tools: Optional[list[str]] = None,
+        permission_prompt_config: Optional[str] = None,
+        on_update: Optional[Callable[[StreamUpdate], Awaitable[None]]] = None,
+    ) -> ClaudeResult:
+        """Execute a prompt on the persistent process for key."""
+        options = {
+            "approval_mode": approval_mode,
+            # Copy, callers keep extending their list between runs
+            "allowed_tools": list(allowed_tools) if allowed_tools else None,
+            "permission_prompt_config": permission_prompt_config,
+        }
+
+        session = self._sessions.get(key)
+        if session is None:
+            session = PersistentSession(self.claude, working_dir, session_id, options)
+            self._sessions[key] = session
+
+        async with session.lock:
+            try:
+                if not session.matches(working_dir, session_id, options):
+                    # New session, reset via /new, or changed tool permissions
+                    await session.close()
+                    session.working_dir = working_dir
+                    session.session_id = session_id
+                    session.options = options
+                    await session.start()
+                logger.info(f"Persistent session {key}: {prompt[:100]}...")
+                return await session.send(prompt, on_update=on_update)
+            except Exception as e:
+                await session.close()
+                return ClaudeResult(success=False, output="", error=str(e))
+            finally:
+                self._ensure_reaper()
+
+    async def close(self, key: str) -> None:
+        """Shut down the process for key, if any."""
+        session = self._sessions.get(key)
+        if session is not None:
+            async with session.lock:
+                await session.close()
+
+    async def close_all(self) -> None:
+        """Shut down all processes and the idle reaper."""
+        if self._reaper_task:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for key in list(self._sessions):
+            await self.close(key)
+        self._sessions.clear()
+
+    def _ensure_reaper(self) -> None:
+        """Start the idle reaper if it isn't running."""
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        """Close processes that have been idle longer than idle_timeout."""
+        loop = asyncio.get_running_loop()
+        while self._sessions:
+            await asyncio.sleep(min(self.idle_timeout, 60.0))
+            now = loop.time()
+            for key, session in list(self._sessions.items()):
+                if session.lock.locked():
+                    continue
+                if not session.is_alive:
+                    del self._sessions[key]
+                elif now - session.last_used >= self.idle_timeout:
+                    logger.info(f"Closing idle persistent session {key}")
+                    await self.close(key)
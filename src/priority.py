@@ -0,0 +1,28 @@
+"""Priority classes for queued work in Claude Code Telegram Bridge."""
+
+# Highest priority first
+PRIORITY_CLASSES = ("interactive", "scheduled", "batch")
+DEFAULT_PRIORITY = "interactive"
+
+# Seconds of waiting that promote a task by one class
+DEFAULT_AGING_INTERVAL = 300.0
+
+
+def priority_rank(priority: str, waited: float = 0.0, aging_interval: float = 0.0) -> int:
+    """Get the effective rank of a priority class (0 = most urgent).
+
+    Args:
+        priority: One of PRIORITY_CLASSES; unknown classes rank lowest
+        waited: Seconds the work has been waiting
+        aging_interval: Seconds of waiting per one-class promotion (0 = no aging)
+
+    Returns:
+        Rank after aging, never below 0
+    """
+    if priority in PRIORITY_CLASSES:
+        rank = PRIORITY_CLASSES.index(priority)
+    else:
+        rank = len(PRIORITY_CLASSES) - 1
+    if aging_interval > 0:
+        rank -= int(waited // aging_interval)
+    return max(rank, 0)
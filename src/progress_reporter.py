@@ -0,0 +1,154 @@
+"""Live progress messages for Claude Code Telegram Bridge."""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+
+from telegram import Bot
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+from .claude_interface import StreamUpdate
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressReporter:
+    """Posts one status message per task and edits it in place.
+
+    Updates are coalesced: at most one edit is in flight, and edits are
+    spaced at least ``min_interval`` seconds apart to stay under Telegram's
+    edit rate limits. Only the latest state is ever sent.
+    """
+
+    MAX_LINES = 12
+    MAX_LINE_LENGTH = 200
+    MAX_MESSAGE_LENGTH = 4000
+
+    def __init__(
+        self,
+        bot: Bot,
+        chat_id: int,
+        header: str,
+        min_interval: float = 3.0,
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.header = header
+        self.min_interval = min_interval
+        self._lines: deque[str] = deque(maxlen=self.MAX_LINES)
+        self._footer = "Working..."
+        self._message_id: Optional[int] = None
+        self._last_text = ""
+        self._last_edit = 0.0
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Post the initial status message."""
+        text = self._render()
+        try:
+            sent = await self.bot.send_message(chat_id=self.chat_id, text=text)
+        except TelegramError as e:
+            logger.warning(f"Could not post progress message: {e}")
+            return
+        self._message_id = sent.message_id
+        self._last_text = text
+        self._last_edit = asyncio.get_running_loop().time()
+
+    async def on_update(self, update: StreamUpdate) -> None:
+        """Record a stream update and schedule a coalesced edit."""
+        lines = self._describe(update)
+        if not lines:
+            return
+
+        self._lines.extend(lines)
+        self._dirty = True
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def finish(self, status: str) -> None:
+        """Write the final status, bypassing the throttle but not a rate-limit backoff."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._footer = status
+        self._dirty = True
+        # After RetryAfter, _last_edit lies in the future until the backoff ends
+        delay = self._last_edit - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._edit()
+
+    def _describe(self, update: StreamUpdate) -> list[str]:
+        """Turn a stream update into progress lines (assistant text and tool uses)."""
+        if update.type != "assistant" or not update.content:
+            return []
+
+        lines = []
+        for line in update.content.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if len(line) > self.MAX_LINE_LENGTH:
+                line = line[: self.MAX_LINE_LENGTH] + "..."
+            lines.append(line)
+        return lines
+
+    def _render(self) -> str:
+        """Render the current status message text."""
+        parts = [self.header]
+        if self._lines:
+            parts.append("\n".join(self._lines))
+        parts.append(self._footer)
+        text = "\n\n".join(parts)
+        if len(text) > self.MAX_MESSAGE_LENGTH:
+            text = "..." + text[-self.MAX_MESSAGE_LENGTH:]
+        return text
+
+    async def _flush_later(self) -> None:
+        """Wait out the throttle window, then send the latest state."""
+        loop = asyncio.get_running_loop()
+        delay = self._last_edit + self.min_interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._edit()
+
+    async def _edit(self) -> None:
+        """Edit the status message if anything changed."""
+        if self._message_id is None or not self._dirty:
+            return
+
+        text = self._render()
+        self._dirty = False
+        if text == self._last_text:
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            await self.bot.edit_message_text(
+                chat_id=self.chat_id,
+                message_id=self._message_id,
+                text=text,
+            )
+            self._last_text = text
+            self._last_edit = loop.time()
+        except RetryAfter as e:
+            # Back off for as long as Telegram asks before the next edit
+            retry_after = e.retry_after
+            if not isinstance(retry_after, (int, float)):
+                retry_after = retry_after.total_seconds()
+            logger.warning(f"Progress edit rate limited, retry after {retry_after}s")
+            self._last_edit = loop.time() + retry_after
+            self._dirty = True
+            # No further update may come to trigger a flush, so schedule one
+            self._flush_task = asyncio.create_task(self._flush_later())
+        except BadRequest as e:
+            # "message is not modified" and similar are harmless
+            logger.debug(f"Progress edit rejected: {e}")
+        except TelegramError as e:
+            logger.warning(f"Progress edit failed: {e}")
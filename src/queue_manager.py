@@ -1,13 +1,49 @@
 """Task queue management for Claude Code Telegram Bridge."""
 
 import asyncio
+import hashlib
+import heapq
+import itertools
 import logging
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Any, Callable, Coroutine, Optional
 
+from .concurrency import FairShareLimiter
+from .metrics import LatencySummary, Metrics
+from .priority import DEFAULT_AGING_INTERVAL, DEFAULT_PRIORITY, PRIORITY_CLASSES, priority_rank
+from .task_store import TaskStore
+
 logger = logging.getLogger(__name__)
 
 
+class QueueRejected(Exception):
+    """A task was not queued. The message is meant for the user."""
+
+
+class QueueFullError(QueueRejected):
+    """The project or global queue depth limit was reached."""
+
+
+class DuplicateTaskError(QueueRejected):
+    """The same prompt is already queued for the project."""
+
+    def __init__(self, message: str, task_id: int):
+        super().__init__(message)
+        self.task_id = task_id  # The queued task it duplicates
+
+
+class TaskExpired(Exception):
+    """A task's deadline passed before its claude run started."""
+
+
+def prompt_hash(task: "QueuedTask") -> str:
+    """Hash what a task would run, ignoring whitespace differences."""
+    content = "\x00".join([task.kind, " ".join(task.prompt.split()), *task.image_paths])
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
 @dataclass
 class QueuedTask:
     """A task waiting in queue."""
@@ -17,21 +53,213 @@ class QueuedTask:
     message_id: int
     chat_id: int
     callback: Callable[..., Coroutine[Any, Any, None]]
+    priority: str = DEFAULT_PRIORITY  # interactive, scheduled, batch
+    enqueued_at: float = field(default_factory=time.monotonic)
+    started_at: Optional[float] = None  # time.monotonic() when the processor picked it up
+    finished_at: Optional[float] = None
+    folded_prompts: list[str] = field(default_factory=list)  # Follow-ups merged in by coalescing
+    kind: str = "message"  # "message" or "scheduled", to pick the processor after a restart
+    source_id: Optional[str] = None  # Scheduled task ID for kind "scheduled"
+    task_id: Optional[int] = None  # Set by enqueue; the row ID when the queue is durable
+    interrupted: bool = False  # Was running when the bridge last stopped
+    content_hash: Optional[str] = None  # prompt_hash() while queued, for duplicate checks
+    deadline: Optional[float] = None  # time.monotonic() after which the task is dropped unstarted
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        """Check if the task's deadline has passed."""
+        if self.deadline is None:
+            return False
+        return (now if now is not None else time.monotonic()) >= self.deadline
+
+
+class PriorityTaskQueue:
+    """FIFO per priority class; waiting tasks are promoted one class per aging interval.
+
+    Each class is an ordered dict keyed by task ID, so a task can be looked
+    up, removed or moved to the front in constant time.
+    """
+
+    def __init__(self, aging_interval: float = DEFAULT_AGING_INTERVAL):
+        self.aging_interval = aging_interval
+        self._classes: dict[str, OrderedDict[int, QueuedTask]] = {
+            p: OrderedDict() for p in PRIORITY_CLASSES
+        }
+        # Tasks moved ahead of every class by bump(), most recently bumped first
+        self._front: OrderedDict[int, QueuedTask] = OrderedDict()
+        self._index: dict[int, OrderedDict[int, QueuedTask]] = {}  # task ID -> its dict
+        self._hashes: dict[str, int] = {}  # content hash -> task ID, for queued tasks
+
+    def qsize(self) -> int:
+        """Number of queued tasks."""
+        return len(self._index)
+
+    def empty(self) -> bool:
+        """Check if no tasks are queued."""
+        return not self._index
+
+    def put_nowait(self, task: QueuedTask) -> None:
+        """Queue a task at the back of its class. The task must have an ID."""
+        if task.priority not in self._classes:
+            task.priority = PRIORITY_CLASSES[-1]
+        queue = self._classes[task.priority]
+        queue[task.task_id] = task
+        self._index[task.task_id] = queue
+        if task.content_hash:
+            self._hashes[task.content_hash] = task.task_id
+
+    def get(self, task_id: int) -> Optional[QueuedTask]:
+        """Get a queued task by ID."""
+        queue = self._index.get(task_id)
+        return queue[task_id] if queue is not None else None
+
+    def find_hash(self, content_hash: str) -> Optional[int]:
+        """Get the ID of a queued task with this content hash."""
+        return self._hashes.get(content_hash)
+
+    def remove(self, task_id: int) -> Optional[QueuedTask]:
+        """Remove a queued task by ID. Returns it, or None if not queued."""
+        queue = self._index.pop(task_id, None)
+        if queue is None:
+            return None
+        task = queue.pop(task_id)
+        self._forget_hash(task)
+        return task
+
+    def bump(self, task_id: int) -> bool:
+        """Move a queued task to the front, ahead of every class. Returns False if not queued."""
+        queue = self._index.get(task_id)
+        if queue is None:
+            return False
+        self._front[task_id] = queue.pop(task_id)
+        self._front.move_to_end(task_id, last=False)
+        self._index[task_id] = self._front
+        return True
+
+    def _forget_hash(self, task: QueuedTask) -> None:
+        """Drop a task's content hash, unless it now points at another task."""
+        if task.content_hash and self._hashes.get(task.content_hash) == task.task_id:
+            del self._hashes[task.content_hash]
+
+    def position(self, task: QueuedTask) -> int:
+        """Number of queued tasks that would run before task, ignoring aging."""
+        queue = self._index.get(task.task_id)
+        if queue is None:
+            return self.qsize()
+        ahead = 0 if queue is self._front else len(self._front)
+        rank = priority_rank(task.priority)
+        for priority, other in self._classes.items():
+            if queue is not self._front and priority_rank(priority) < rank:
+                ahead += len(other)
+        if next(reversed(queue)) == task.task_id:
+            # Just enqueued, the common case
+            return ahead + len(queue) - 1
+        return ahead + next(i for i, key in enumerate(queue) if key == task.task_id)
+
+    def tasks(self) -> list[QueuedTask]:
+        """All queued tasks in the order they would run, ignoring aging."""
+        ordered = list(self._front.values())
+        for queue in self._classes.values():
+            ordered.extend(queue.values())
+        return ordered
+
+    def take_matching(self, predicate: Callable[[QueuedTask], bool]) -> list[QueuedTask]:
+        """Remove and return all queued tasks matching predicate, oldest first."""
+        taken = [task for task in self.tasks() if predicate(task)]
+        for task in taken:
+            self.remove(task.task_id)
+        return sorted(taken, key=lambda t: t.enqueued_at)
+
+    def get_nowait(self) -> QueuedTask:
+        """Remove the most urgent task: the head with the best aged rank, oldest first on ties.
+
+        Bumped tasks go first. Otherwise heads are the oldest task of each
+        class, so only they need checking.
+        Raises asyncio.QueueEmpty if no tasks are queued.
+        """
+        if self.empty():
+            raise asyncio.QueueEmpty
+        if self._front:
+            _, task = self._front.popitem(last=False)
+        else:
+            now = time.monotonic()
+            heads = [next(iter(q.values())) for q in self._classes.values() if q]
+            task = min(
+                heads,
+                key=lambda t: (
+                    priority_rank(t.priority, now - t.enqueued_at, self.aging_interval),
+                    t.enqueued_at,
+                ),
+            )
+            self._classes[task.priority].pop(task.task_id)
+        del self._index[task.task_id]
+        self._forget_hash(task)
+        return task
 
 
 class QueueManager:
     """Manages per-project task queues."""
 
-    def __init__(self):
-        self._queues: dict[str, asyncio.Queue[QueuedTask]] = {}
-        self._processors: dict[str, asyncio.Task] = {}
-        self._current_tasks: dict[str, Optional[QueuedTask]] = {}
-        self._skip_events: dict[str, asyncio.Event] = {}
+    def __init__(
+        self,
+        limiter: Optional[FairShareLimiter] = None,
+        aging_interval: float = DEFAULT_AGING_INTERVAL,
+        coalesce_window: float = 0.0,
+        store: Optional[TaskStore] = None,
+        metrics: Optional[Metrics] = None,
+        max_depth: int = 0,
+        max_total_depth: int = 0,
+        suppress_duplicates: bool = False,
+        on_expired: Optional[Callable[[QueuedTask], Coroutine[Any, Any, None]]] = None,
+    ):
+        # Wait (enqueue to start) times per project; the limiter adds service times
+        self.metrics = metrics or Metrics()
+        # Global run budget shared by all projects; callers hold a slot per claude run
+        self.limiter = limiter or FairShareLimiter(aging_interval=aging_interval, metrics=self.metrics)
+        self.aging_interval = aging_interval
+        # Seconds to hold a task for follow-ups from the same chat (0 = no coalescing)
+        self.coalesce_window = coalesce_window
+        # Durable mirror of queued and running tasks (None = memory only)
+        self.store = store
+        # Backpressure: queued (not running) tasks per project and overall, 0 = unlimited
+        self.max_depth = max_depth
+        self.max_total_depth = max_total_depth
+        self.suppress_duplicates = suppress_duplicates
+        # Called for each task dropped because its deadline passed
+        self.on_expired = on_expired
+        self._closing = False
+        self._queues: dict[str, PriorityTaskQueue] = {}
+        # Queued and running tasks by ID, across projects
+        self._tasks: dict[int, QueuedTask] = {}
+        # Task IDs when there is no store to hand them out
+        self._ids = itertools.count(1)
+        # Tasks run concurrently per project (1 unless it has a worktree pool)
+        self._lanes: dict[str, int] = {}
+        # Default seconds a task may wait before it is dropped, per project
+        self._ttls: dict[str, float] = {}
+        # (deadline, task ID) of queued tasks; one timer fires at the earliest
+        self._deadlines: list[tuple[float, int]] = []
+        self._expiry_timer: Optional[asyncio.TimerHandle] = None
+        self._expiry_at: Optional[float] = None
+        # Worker tasks per project; present only while the project has work
+        self._workers: dict[str, set[asyncio.Task]] = {}
+        # (task, asyncio task running its processor) per project, oldest first
+        self._active: dict[str, list[tuple[QueuedTask, asyncio.Task]]] = {}
+
+    def set_lanes(self, project_name: str, lanes: int) -> None:
+        """Set how many tasks of a project may run at once."""
+        self._lanes[project_name] = max(1, lanes)
 
-    def _get_queue(self, project_name: str) -> asyncio.Queue[QueuedTask]:
+    def set_ttl(self, project_name: str, ttl: float) -> None:
+        """Set the default seconds a project's tasks may wait before being dropped (0 = forever)."""
+        if ttl > 0:
+            self._ttls[project_name] = ttl
+        else:
+            self._ttls.pop(project_name, None)
+
+    def _get_queue(self, project_name: str) -> PriorityTaskQueue:
         """Get or create queue for project."""
         if project_name not in self._queues:
-            self._queues[project_name] = asyncio.Queue()
+            self._queues[project_name] = PriorityTaskQueue(self.aging_interval)
         return self._queues[project_name]
 
     async def enqueue(
@@ -39,64 +267,383 @@ class QueueManager:
         task: QueuedTask,
         processor: Callable[[QueuedTask], Coroutine[Any, Any, None]],
     ) -> int:
-        """Add task to queue. Returns queue position (0 = processing now)."""
+        """Add task to queue. Returns queue position (0 = processing now).
+
+        Raises:
+            QueueFullError: A depth limit was reached
+            DuplicateTaskError: The same prompt is already queued for the project
+
+        Tasks that already have an ID (recovered from the store) were
+        accepted before and are never rejected.
+        """
         project_name = task.project_name
+        if self.suppress_duplicates:
+            task.content_hash = prompt_hash(task)
+        if task.task_id is None:
+            self._check_admission(task)
+
         queue = self._get_queue(project_name)
+        task.callback = processor
+        # Recovered tasks (with an ID) keep the deadline they were stored with
+        if task.deadline is None and task.task_id is None and project_name in self._ttls:
+            task.deadline = task.enqueued_at + self._ttls[project_name]
+        if self.store and task.task_id is None:
+            task.task_id = self.store.add(
+                project_name=project_name,
+                chat_id=task.chat_id,
+                message_id=task.message_id,
+                prompt=task.prompt,
+                image_paths=task.image_paths,
+                priority=task.priority,
+                kind=task.kind,
+                source_id=task.source_id,
+                created_at=time.time() - (time.monotonic() - task.enqueued_at),
+                deadline=(
+                    time.time() + (task.deadline - time.monotonic())
+                    if task.deadline is not None else None
+                ),
+            )
+        elif task.task_id is None:
+            task.task_id = next(self._ids)
+        self._tasks[task.task_id] = task
+        queue.put_nowait(task)
+        if task.deadline is not None:
+            heapq.heappush(self._deadlines, (task.deadline, task.task_id))
+            self._schedule_expiry()
 
-        # Get position before adding
-        position = queue.qsize()
-        if project_name in self._current_tasks and self._current_tasks[project_name]:
-            position += 1  # Account for currently processing task
+        position = queue.position(task)
+        running = len(self._active.get(project_name, []))
+        if running:
+            # Account for tasks being processed; with free lanes the task starts at once
+            position += 1 if running >= self._lanes.get(project_name, 1) else 0
 
-        await queue.put(task)
+        if self._closing:
+            # Left in the store for the next start
+            logger.info(f"Queue closing, not starting task for {project_name}")
+        else:
+            self._start_workers(project_name)
 
-        # Start processor if not running
-        if project_name not in self._processors or self._processors[project_name].done():
-            self._processors[project_name] = asyncio.create_task(
-                self._process_queue(project_name, processor)
+        return position
+
+    def _check_admission(self, task: QueuedTask) -> None:
+        """Raise if a new task must be turned away."""
+        project_name = task.project_name
+        queue = self._queues.get(project_name) or PriorityTaskQueue()
+        if task.content_hash:
+            existing = queue.find_hash(task.content_hash)
+            if existing is not None:
+                logger.info(f"Suppressed duplicate of task {existing} for {project_name}")
+                raise DuplicateTaskError(
+                    f"Already queued for #{project_name} as task {existing}; not queued again.",
+                    existing,
+                )
+
+        if self.max_depth > 0 and queue.qsize() >= self.max_depth:
+            logger.warning(f"Queue for {project_name} full ({queue.qsize()} waiting)")
+            raise QueueFullError(
+                f"Queue for #{project_name} is full ({queue.qsize()} waiting, limit "
+                f"{self.max_depth}). Try again later, or /queue and /cancel to make room."
             )
-            self._skip_events[project_name] = asyncio.Event()
 
-        return position
+        if self.max_total_depth > 0:
+            total = sum(q.qsize() for q in self._queues.values())
+            if total >= self.max_total_depth:
+                logger.warning(f"Queues full ({total} waiting), rejected task for {project_name}")
+                raise QueueFullError(
+                    f"Too many tasks waiting ({total} across all projects, limit "
+                    f"{self.max_total_depth}). Try again later, or /queue and /cancel to make room."
+                )
 
-    async def _process_queue(
-        self,
-        project_name: str,
-        processor: Callable[[QueuedTask], Coroutine[Any, Any, None]],
-    ) -> None:
-        """Process tasks in queue sequentially."""
+    def _start_workers(self, project_name: str) -> None:
+        """Start workers until every queued task has one, up to the project's lanes."""
+        workers = self._workers.setdefault(project_name, set())
+        busy = len(self._active.get(project_name, []))
+        wanted = min(self._lanes.get(project_name, 1), busy + self._get_queue(project_name).qsize())
+        while len(workers) < wanted:
+            workers.add(asyncio.create_task(self._worker(project_name)))
+
+    async def _worker(self, project_name: str) -> None:
+        """Run a project's queued tasks one after another, most urgent first.
+
+        Workers are started by enqueue() and exit as soon as the queue is
+        empty, so idle projects hold no task and no timer. There is no await
+        between finding the queue empty and deregistering, so a task enqueued
+        at any moment is either taken by a live worker or starts a new one.
+
+        Each task runs with the processor it was enqueued with, so scheduled
+        and interactive tasks can share a project queue.
+        """
         queue = self._get_queue(project_name)
+        worker = asyncio.current_task()
 
-        while True:
-            try:
-                # Wait for next task
-                task = await asyncio.wait_for(queue.get(), timeout=60.0)
-                self._current_tasks[project_name] = task
+        try:
+            while not queue.empty():
+                task = queue.get_nowait()
+                if task.is_expired():
+                    # Due in the same tick as the expiry timer
+                    self._expire(task)
+                    continue
+                task.started_at = time.monotonic()
+                self.metrics.record("queue_wait", project_name, task.started_at - task.enqueued_at)
+                if self.store:
+                    self.store.mark_running(task.task_id)
 
+                # Run in its own task so /skip and /cancel can cancel it
+                run = asyncio.create_task(self._run_task(queue, task))
+                active = self._active.setdefault(project_name, [])
+                active.append((task, run))
                 try:
-                    await processor(task)
-                except Exception as e:
-                    logger.error(f"Error processing task for {project_name}: {e}")
+                    await asyncio.wait({run})
+                except asyncio.CancelledError:
+                    run.cancel()
+                    raise
                 finally:
-                    self._current_tasks[project_name] = None
-                    queue.task_done()
+                    task.finished_at = time.monotonic()
+                    active.remove((task, run))
+                    if not active:
+                        del self._active[project_name]
+                    self._tasks.pop(task.task_id, None)
+                    # On shutdown the row stays so the task is recovered on restart
+                    if self.store and not self._closing:
+                        self.store.remove(task.task_id)
 
-            except asyncio.TimeoutError:
-                # No tasks for 60 seconds, stop processor
+                if run.cancelled():
+                    logger.info(f"Task for {project_name} cancelled")
+                elif isinstance(run.exception(), TaskExpired):
+                    self._expire(task)
+                elif run.exception():
+                    logger.error(f"Error processing task for {project_name}: {run.exception()}")
+        finally:
+            workers = self._workers[project_name]
+            workers.discard(worker)
+            if not workers:
+                del self._workers[project_name]
                 if queue.empty():
-                    logger.info(f"Queue processor for {project_name} stopping (idle)")
-                    break
+                    del self._queues[project_name]
+
+    def _schedule_expiry(self) -> None:
+        """Point the expiry timer at the earliest deadline still queued."""
+        while self._deadlines:
+            deadline, task_id = self._deadlines[0]
+            task = self._tasks.get(task_id)
+            if task is not None and task.deadline == deadline and task.started_at is None:
+                break
+            # Started, cancelled or dropped since
+            heapq.heappop(self._deadlines)
+
+        if not self._deadlines:
+            if self._expiry_timer:
+                self._expiry_timer.cancel()
+            self._expiry_timer = self._expiry_at = None
+            return
+
+        deadline = self._deadlines[0][0]
+        if self._expiry_at == deadline:
+            return
+        if self._expiry_timer:
+            self._expiry_timer.cancel()
+        self._expiry_at = deadline
+        self._expiry_timer = asyncio.get_running_loop().call_later(
+            max(0.0, deadline - time.monotonic()), self._expire_due
+        )
+
+    def _expire_due(self) -> None:
+        """Drop every queued task whose deadline has passed."""
+        self._expiry_timer = self._expiry_at = None
+        now = time.monotonic()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, task_id = heapq.heappop(self._deadlines)
+            task = self._tasks.get(task_id)
+            if task is None or task.deadline != deadline:
+                continue
+            queue = self._queues.get(task.project_name)
+            if queue and queue.remove(task_id):
+                self._expire(task)
+        self._schedule_expiry()
+
+    def _expire(self, task: QueuedTask) -> None:
+        """Forget a task whose deadline passed and tell its owner."""
+        logger.info(
+            f"Dropped expired task {task.task_id} for {task.project_name} "
+            f"after {time.monotonic() - task.enqueued_at:.0f}s"
+        )
+        self._tasks.pop(task.task_id, None)
+        self.discard(task)
+        self.metrics.record("expired_wait", task.project_name, time.monotonic() - task.enqueued_at)
+        if self.on_expired and not self._closing:
+            asyncio.create_task(self.on_expired(task))
+
+    async def _run_task(self, queue: PriorityTaskQueue, task: QueuedTask) -> None:
+        """Run a task with its processor, folding in follow-ups first if enabled."""
+        if self.coalesce_window > 0:
+            await self._coalesce(queue, task)
+        await task.callback(task)
+
+    async def _coalesce(self, queue: PriorityTaskQueue, task: QueuedTask) -> None:
+        """Merge queued tasks from the same chat and processor into task.
+
+        Waits until task is coalesce_window seconds old so messages sent in
+        quick succession end up in one run.
+        """
+        wait = self.coalesce_window - (time.monotonic() - task.enqueued_at)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+        followups = queue.take_matching(
+            lambda t: t.chat_id == task.chat_id and t.callback == task.callback
+        )
+        for followup in followups:
+            task.prompt += f"\n\n[Follow-up message]\n{followup.prompt}"
+            task.image_paths.extend(followup.image_paths)
+            task.folded_prompts.append(followup.prompt)
+        for followup in followups:
+            del self._tasks[followup.task_id]
+        if followups and self.store:
+            self.store.fold(
+                task.task_id, task.prompt, task.image_paths, [f.task_id for f in followups]
+            )
+        if followups:
+            logger.info(f"Coalesced {len(followups)} follow-up(s) into task for {task.project_name}")
+
+    def load_stored(self) -> list[QueuedTask]:
+        """Rebuild tasks left in the store by a previous run, oldest first.
+
+        Tasks that were running when the bridge stopped come back as pending
+        with interrupted set and no deadline, since they had already started.
+        Callers re-queue them with enqueue() or drop them
+        with discard().
+        """
+        if not self.store:
+            return []
+
+        tasks = []
+        now_wall, now_mono = time.time(), time.monotonic()
+        for stored in self.store.load():
+            interrupted = stored.state == "running"
+            tasks.append(QueuedTask(
+                project_name=stored.project_name,
+                prompt=stored.prompt,
+                image_paths=stored.image_paths,
+                message_id=stored.message_id,
+                chat_id=stored.chat_id,
+                callback=None,
+                priority=stored.priority,
+                # Keep the original age so priority aging carries over
+                enqueued_at=now_mono - max(0.0, now_wall - stored.created_at),
+                kind=stored.kind,
+                source_id=stored.source_id,
+                task_id=stored.task_id,
+                interrupted=interrupted,
+                deadline=(
+                    now_mono + (stored.deadline - now_wall)
+                    if stored.deadline is not None and not interrupted else None
+                ),
+            ))
+        return tasks
+
+    def discard(self, task: QueuedTask) -> None:
+        """Drop a task from the store without running it."""
+        if self.store and task.task_id is not None:
+            self.store.remove(task.task_id)
+
+    async def close(self) -> None:
+        """Stop all workers, leaving stored tasks for the next start."""
+        self._closing = True
+        if self._expiry_timer:
+            self._expiry_timer.cancel()
+        workers = [w for project in self._workers.values() for w in project]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self.store:
+            # Waits for the writer thread to drain, off the event loop
+            await asyncio.to_thread(self.store.close)
 
     def skip_current(self, project_name: str) -> bool:
-        """Signal to skip current task. Returns True if there was a task."""
-        if project_name in self._skip_events:
-            self._skip_events[project_name].set()
-            return project_name in self._current_tasks and self._current_tasks[project_name] is not None
+        """Cancel the running task so the next one starts. Returns True if there was a task.
+
+        With several lanes the oldest running task is cancelled. Cancellation
+        reaches ClaudeInterface, which terminates the claude process group in
+        the background, so the queue slot frees at once.
+        """
+        for _, run in self._active.get(project_name, []):
+            if not run.done():
+                run.cancel()
+                return True
         return False
 
-    def get_skip_event(self, project_name: str) -> Optional[asyncio.Event]:
-        """Get skip event for project."""
-        return self._skip_events.get(project_name)
+    def get_task(self, task_id: int) -> Optional[QueuedTask]:
+        """Get a queued or running task by ID."""
+        return self._tasks.get(task_id)
+
+    def cancel(self, task_id: int) -> Optional[str]:
+        """Cancel a task by ID.
+
+        Returns:
+            "queued" if it was dropped from its queue, "running" if its run
+            was cancelled, or None if no such task
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+
+        queue = self._queues.get(task.project_name)
+        if queue and queue.remove(task_id):
+            del self._tasks[task_id]
+            self.discard(task)
+            logger.info(f"Cancelled queued task {task_id} for {task.project_name}")
+            return "queued"
+
+        for active, run in self._active.get(task.project_name, []):
+            if active is task and not run.done():
+                run.cancel()
+                return "running"
+        return None
+
+    def bump(self, task_id: int) -> bool:
+        """Move a queued task to the front of its project's queue."""
+        task = self._tasks.get(task_id)
+        queue = self._queues.get(task.project_name) if task else None
+        return bool(queue and queue.bump(task_id))
+
+    def get_tasks(self, project_name: Optional[str] = None) -> list[QueuedTask]:
+        """Get running then queued tasks, per project, in the order they would run.
+
+        Args:
+            project_name: Limit to one project, if set
+        """
+        names = [project_name] if project_name is not None else sorted(
+            set(self._queues) | set(self._active)
+        )
+        tasks = []
+        for name in names:
+            tasks.extend(self.get_current_tasks(name))
+            if name in self._queues:
+                tasks.extend(self._queues[name].tasks())
+        return tasks
+
+    def get_timing_stats(
+        self,
+        project_name: Optional[str] = None,
+    ) -> dict[str, dict[str, LatencySummary]]:
+        """Get wait and service time percentiles over the rolling window.
+
+        Service time is per run, from taking a run slot to finishing; a task
+        with approval rounds contributes one sample per round.
+
+        Args:
+            project_name: Limit to one project, if set
+
+        Returns:
+            {"queue_wait": {project: summary}, "service": {project: summary}}
+        """
+        stats = {}
+        for metric in ("queue_wait", "service"):
+            summaries = self.metrics.get_summary(metric)
+            if project_name is not None:
+                summaries = {k: v for k, v in summaries.items() if k == project_name}
+            stats[metric] = summaries
+        return stats
 
     def get_queue_size(self, project_name: str) -> int:
         """Get current queue size for project."""
@@ -105,8 +652,13 @@ class QueueManager:
         return self._queues[project_name].qsize()
 
     def get_current_task(self, project_name: str) -> Optional[QueuedTask]:
-        """Get currently processing task for project."""
-        return self._current_tasks.get(project_name)
+        """Get currently processing task for project (the oldest, if several)."""
+        active = self._active.get(project_name)
+        return active[0][0] if active else None
+
+    def get_current_tasks(self, project_name: str) -> list[QueuedTask]:
+        """Get all tasks currently processing for project, oldest first."""
+        return [task for task, _ in self._active.get(project_name, [])]
 
     def get_all_queue_sizes(self) -> dict[str, int]:
         """Get queue sizes for all projects."""
@@ -0,0 +1,163 @@
+"""Per-run resource accounting for Claude Code Telegram Bridge.
+
+asyncio's child watcher reaps CLI processes itself, so os.wait4 rusage is
+not available to us, and it would miss the node/tool processes the CLI
+starts anyway. Instead the process tree is sampled with psutil (optional)
+while the run is in flight. Without psutil only wall time is recorded.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds between process tree samples
+SAMPLE_INTERVAL = 1.0
+
+
+@dataclass
+class ResourceUsage:
+    """Resources used by one Claude run."""
+    wall_time: float
+    cpu_user: Optional[float] = None  # seconds, whole process tree
+    cpu_system: Optional[float] = None
+    max_rss: Optional[int] = None  # bytes, peak summed over the tree
+
+
+class ResourceMonitor:
+    """Samples CPU time and RSS of a process tree while it runs."""
+
+    def __init__(self, pid: int, interval: float = SAMPLE_INTERVAL):
+        self.pid = pid
+        self.interval = interval
+        self._started = time.monotonic()
+        self._baseline: Optional[tuple[float, float]] = None
+        self._cpu: Optional[tuple[float, float]] = None
+        self._max_rss: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Take a baseline sample and start sampling in the background."""
+        self._started = time.monotonic()
+        if psutil is None:
+            return
+        self._sample()
+        self._baseline = self._cpu
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> ResourceUsage:
+        """Stop sampling and return what was used since start()."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Catch the tail of a run that outlived the last tick
+            self._sample()
+
+        usage = ResourceUsage(wall_time=time.monotonic() - self._started)
+        if self._cpu is not None and self._baseline is not None:
+            usage.cpu_user = self._cpu[0] - self._baseline[0]
+            usage.cpu_system = self._cpu[1] - self._baseline[1]
+            usage.max_rss = self._max_rss
+        return usage
+
+    async def _run(self) -> None:
+        """Sample until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self._sample()
+
+    def _sample(self) -> None:
+        """Record one sample of the process tree.
+
+        Each live process contributes its own CPU time plus that of the
+        children it has reaped, which counts every exited descendant once.
+        """
+        try:
+            root = psutil.Process(self.pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return
+
+        user = system = 0.0
+        rss = 0
+        for proc in procs:
+            try:
+                with proc.oneshot():
+                    cpu = proc.cpu_times()
+                    rss += proc.memory_info().rss
+            except psutil.Error:
+                continue
+            user += cpu.user + getattr(cpu, "children_user", 0.0)
+            system += cpu.system + getattr(cpu, "children_system", 0.0)
+
+        # Totals only grow; a process between exit and reaping reads low
+        if self._cpu is None or user + system >= sum(self._cpu):
+            self._cpu = (user, system)
+        if self._max_rss is None or rss > self._max_rss:
+            self._max_rss = rss
+
+
+@dataclass
+class ProjectResourceTotals:
+    """Aggregated resource usage for one project."""
+    runs: int = 0
+    wall_time: float = 0.0
+    cpu_user: float = 0.0
+    cpu_system: float = 0.0
+    max_rss: int = 0
+    stderr_bytes: int = 0
+
+
+class ResourceStats:
+    """Aggregates per-run resource usage by project."""
+
+    def __init__(self):
+        self._totals: dict[str, ProjectResourceTotals] = {}
+
+    def record(self, project_name: str, usage: ResourceUsage, stderr_bytes: int = 0) -> None:
+        """Add one run's usage (and the bytes it wrote to stderr) to the project totals."""
+        totals = self._totals.setdefault(project_name, ProjectResourceTotals())
+        totals.runs += 1
+        totals.wall_time += usage.wall_time
+        totals.cpu_user += usage.cpu_user or 0.0
+        totals.cpu_system += usage.cpu_system or 0.0
+        totals.max_rss = max(totals.max_rss, usage.max_rss or 0)
+        totals.stderr_bytes += stderr_bytes
+
+    def get_totals(self) -> dict[str, ProjectResourceTotals]:
+        """Get totals for all projects, busiest (by CPU) first."""
+        return dict(sorted(
+            self._totals.items(),
+            key=lambda item: item[1].cpu_user + item[1].cpu_system,
+            reverse=True,
+        ))
+
+    def format_totals(self) -> str:
+        """Format totals for a Telegram message."""
+        if not self._totals:
+            return "No runs recorded yet."
+
+        lines = ["Resource usage since start:\n"]
+        for name, totals in self.get_totals().items():
+            lines.append(f"#{name} - {totals.runs} run(s)")
+            lines.append(f"  Wall: {totals.wall_time:.1f}s")
+            if psutil is not None:
+                lines.append(f"  CPU: {totals.cpu_user:.1f}s user, {totals.cpu_system:.1f}s sys")
+                lines.append(f"  Peak RSS: {totals.max_rss / (1024 * 1024):.0f} MB")
+            if totals.stderr_bytes:
+                lines.append(f"  Stderr: {totals.stderr_bytes / 1024:.1f} KB")
+        if psutil is None:
+            lines.append("\nInstall psutil for CPU and memory figures.")
+        return "\n".join(lines)
@@ -25,6 +25,7 @@ class ScheduledTask:
     time_of_day: str  # "HH:MM" for daily/weekly
     day_of_week: Optional[int]  # 0-6 for weekly (0=Monday)
     last_run: Optional[str]  # ISO datetime
+    priority: str = "scheduled"  # Queue priority class: "scheduled" or "batch"
 
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
@@ -86,6 +87,7 @@ class ScheduledTaskManager:
         run_time: datetime,
         time_of_day: str = "",
         day_of_week: Optional[int] = None,
+        priority: str = "scheduled",
     ) -> ScheduledTask:
         """Create a new scheduled task.
 
@@ -97,6 +99,7 @@ class ScheduledTaskManager:
             run_time: When to first run (datetime)
             time_of_day: "HH:MM" format for recurring tasks
             day_of_week: 0-6 (Monday-Sunday) for weekly tasks
+            priority: Queue priority class ("scheduled" or "batch")
 
         Returns:
             The created ScheduledTask
@@ -113,6 +116,7 @@ class ScheduledTaskManager:
             time_of_day=time_of_day,
             day_of_week=day_of_week,
             last_run=None,
+            priority=priority,
         )
         self._tasks[task_id] = task
         self._save()
@@ -135,6 +139,10 @@ class ScheduledTaskManager:
             return True
         return False
 
+    def get_task(self, task_id: str) -> Optional[ScheduledTask]:
+        """Get a scheduled task by ID, if it exists."""
+        return self._tasks.get(task_id)
+
     def list_tasks(self, chat_id: Optional[int] = None) -> list[ScheduledTask]:
         """List all scheduled tasks.
 
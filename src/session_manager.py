@@ -1,9 +1,26 @@
-"""Session persistence for Claude Code Telegram Bridge."""
+"""Session persistence for Claude Code Telegram Bridge.
 
+Session IDs and per-chat preferences are loaded once at start and served
+from memory. Changes mark the file dirty; dirty files are written in a
+worker thread, batched over FLUSH_DELAY seconds and replaced atomically,
+so handling a message never blocks the event loop on disk I/O.
+"""
+
+import asyncio
 import json
+import logging
+import os
+import re
 from pathlib import Path
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+# Seconds to gather changes before writing them out
+FLUSH_DELAY = 1.0
+
+_CHAT_PREFS_PATTERN = re.compile(r"^chat_(-?\d+)_prefs$")
+
 
 class SessionManager:
     """Manages session ID persistence per project."""
@@ -12,6 +29,12 @@ class SessionManager:
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
         self._sessions: dict[str, str] = {}
+        self._chat_prefs: dict[int, dict] = {}
+        # Files to write (contents) or delete (None) on the next flush
+        self._dirty: dict[Path, Optional[dict]] = {}
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_tasks: set[asyncio.Task] = set()
         self._load_all()
 
     def _session_file(self, project_name: str) -> Path:
@@ -19,40 +42,104 @@ class SessionManager:
         return self.storage_path / f"{project_name}.json"
 
     def _load_all(self) -> None:
-        """Load all existing sessions from disk."""
+        """Load all existing sessions and chat preferences from disk."""
         for file in self.storage_path.glob("*.json"):
             try:
                 with open(file, "r", encoding="utf-8") as f:
                     data = json.load(f)
-                    project_name = file.stem
-                    if "session_id" in data:
-                        self._sessions[project_name] = data["session_id"]
-            except (json.JSONDecodeError, IOError):
+                prefs_match = _CHAT_PREFS_PATTERN.match(file.stem)
+                if prefs_match:
+                    if isinstance(data, dict):
+                        self._chat_prefs[int(prefs_match.group(1))] = data
+                elif "session_id" in data:
+                    self._sessions[file.stem] = data["session_id"]
+            except (json.JSONDecodeError, IOError, TypeError):
                 # Skip corrupted files
                 pass
 
+    def _mark_dirty(self, path: Path, data: Optional[dict]) -> None:
+        """Queue a file to be written (or deleted, if data is None) on the next flush."""
+        self._dirty[path] = dict(data) if data is not None else None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (startup, scripts): nothing to block, write now
+            self._write_files(self._take_dirty())
+            return
+        if self._flush_timer is None:
+            self._flush_timer = loop.call_later(FLUSH_DELAY, self._start_flush)
+
+    def _take_dirty(self) -> dict[Path, Optional[str]]:
+        """Snapshot pending writes as serialized contents and clear them."""
+        pending = {
+            path: json.dumps(data) if data is not None else None
+            for path, data in self._dirty.items()
+        }
+        self._dirty = {}
+        return pending
+
+    def _start_flush(self) -> None:
+        """Timer callback: write pending changes in the background."""
+        self._flush_timer = None
+        task = asyncio.create_task(self.flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self) -> None:
+        """Write all pending changes now, off the event loop."""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # One flush at a time, so writes of the same file land in order
+        async with self._flush_lock:
+            if self._dirty:
+                await asyncio.to_thread(self._write_files, self._take_dirty())
+
+    async def close(self) -> None:
+        """Flush pending changes; call before shutdown."""
+        await self.flush()
+
+    @staticmethod
+    def _write_files(pending: dict[Path, Optional[str]]) -> None:
+        """Write (atomically) or delete files."""
+        for path, contents in pending.items():
+            try:
+                if contents is None:
+                    path.unlink(missing_ok=True)
+                    continue
+                tmp_file = path.with_suffix(".tmp")
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    f.write(contents)
+                os.replace(tmp_file, path)
+            except OSError as e:
+                logger.error(f"Failed to write {path.name}: {e}")
+
     def get_session_id(self, project_name: str) -> Optional[str]:
         """Get session ID for a project, if exists."""
         return self._sessions.get(project_name)
 
     def set_session_id(self, project_name: str, session_id: str) -> None:
         """Store session ID for a project."""
+        if self._sessions.get(project_name) == session_id:
+            return
         self._sessions[project_name] = session_id
-
-        session_file = self._session_file(project_name)
-        with open(session_file, "w", encoding="utf-8") as f:
-            json.dump({"session_id": session_id}, f)
+        self._mark_dirty(self._session_file(project_name), {"session_id": session_id})
 
     def reset_session(self, project_name: str) -> bool:
-        """Reset session for a project. Returns True if session existed."""
-        if project_name in self._sessions:
-            del self._sessions[project_name]
+        """Reset session for a project, and those of its worktrees.
 
-            session_file = self._session_file(project_name)
-            if session_file.exists():
-                session_file.unlink()
-            return True
-        return False
+        Returns True if a session existed.
+        """
+        keys = [
+            key for key in self._sessions
+            if key == project_name or key.startswith(f"{project_name}@")
+        ]
+        for key in keys:
+            del self._sessions[key]
+            self._mark_dirty(self._session_file(key), None)
+        return bool(keys)
 
     def list_sessions(self) -> dict[str, str]:
         """Get all active sessions."""
@@ -62,34 +149,25 @@ class SessionManager:
         """Get path to chat preferences file."""
         return self.storage_path / f"chat_{chat_id}_prefs.json"
 
+    def _set_chat_pref(self, chat_id: int, key: str, value: Optional[object]) -> bool:
+        """Set (or remove, if value is None) a chat preference. Returns True if it changed."""
+        prefs = self._chat_prefs.setdefault(chat_id, {})
+        if prefs.get(key) == value and (value is not None or key not in prefs):
+            return False
+        if value is None:
+            del prefs[key]
+        else:
+            prefs[key] = value
+        self._mark_dirty(self._chat_prefs_file(chat_id), prefs)
+        return True
+
     def get_last_project(self, chat_id: int) -> Optional[str]:
         """Get the last-used project for a chat."""
-        prefs_file = self._chat_prefs_file(chat_id)
-        if not prefs_file.exists():
-            return None
-        try:
-            with open(prefs_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("last_project")
-        except (json.JSONDecodeError, IOError):
-            return None
+        return self._chat_prefs.get(chat_id, {}).get("last_project")
 
     def set_last_project(self, chat_id: int, project_name: str) -> None:
-        """Store the last-used project for a chat."""
-        prefs_file = self._chat_prefs_file(chat_id)
-
-        # Load existing prefs or start fresh
-        data = {}
-        if prefs_file.exists():
-            try:
-                with open(prefs_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-
-        data["last_project"] = project_name
-        with open(prefs_file, "w", encoding="utf-8") as f:
-            json.dump(data, f)
+        """Store the last-used project for a chat. Unchanged values are not rewritten."""
+        self._set_chat_pref(chat_id, "last_project", project_name)
 
     def get_attached_session(self, chat_id: int) -> Optional[dict]:
         """Get attached desktop session for a chat.
@@ -97,15 +175,8 @@ class SessionManager:
         Returns:
             Dict with session_id and project_path, or None if not attached.
         """
-        prefs_file = self._chat_prefs_file(chat_id)
-        if not prefs_file.exists():
-            return None
-        try:
-            with open(prefs_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("attached_session")
-        except (json.JSONDecodeError, IOError):
-            return None
+        attached = self._chat_prefs.get(chat_id, {}).get("attached_session")
+        return dict(attached) if attached else None
 
     def set_attached_session(
         self, chat_id: int, session_id: str, project_path: str
@@ -117,23 +188,10 @@ class SessionManager:
             session_id: Claude Code session UUID.
             project_path: Working directory for the session.
         """
-        prefs_file = self._chat_prefs_file(chat_id)
-
-        # Load existing prefs or start fresh
-        data = {}
-        if prefs_file.exists():
-            try:
-                with open(prefs_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                pass
-
-        data["attached_session"] = {
+        self._set_chat_pref(chat_id, "attached_session", {
             "session_id": session_id,
             "project_path": project_path,
-        }
-        with open(prefs_file, "w", encoding="utf-8") as f:
-            json.dump(data, f)
+        })
 
     def clear_attached_session(self, chat_id: int) -> bool:
         """Detach from desktop session.
@@ -144,20 +202,6 @@ class SessionManager:
         Returns:
             True if was attached, False otherwise.
         """
-        prefs_file = self._chat_prefs_file(chat_id)
-        if not prefs_file.exists():
-            return False
-
-        try:
-            with open(prefs_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
+        if "attached_session" not in self._chat_prefs.get(chat_id, {}):
             return False
-
-        if "attached_session" not in data:
-            return False
-
-        del data["attached_session"]
-        with open(prefs_file, "w", encoding="utf-8") as f:
-            json.dump(data, f)
-        return True
+        return self._set_chat_pref(chat_id, "attached_session", None)
@@ -0,0 +1,150 @@
+"""Stream-json event decoding for Claude Code Telegram Bridge.
+
+Lines are decoded with orjson or msgspec when installed, falling back to
+the standard library, and reduced to small slotted structs holding only
+the fields the bridge uses. Nothing keeps the decoded dict alive.
+"""
+
+import json
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        _loads = msgspec.json.Decoder().decode
+        JSON_BACKEND = "msgspec"
+    except ImportError:
+        _loads = json.loads
+        JSON_BACKEND = "json"
+
+# orjson's error subclasses json.JSONDecodeError; msgspec's doesn't
+_DECODE_ERRORS: tuple[type[Exception], ...] = (ValueError,)
+if JSON_BACKEND == "msgspec":
+    _DECODE_ERRORS = (ValueError, msgspec.DecodeError)
+
+
+@dataclass(slots=True)
+class SystemEvent:
+    """A system message (init, hooks, etc.)."""
+    subtype: str
+    session_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class AssistantEvent:
+    """An assistant message, reduced to its text and tool-use markers."""
+    content: str
+    session_id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class TokenUsage:
+    """Token counts and cost reported by a result event."""
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cost_usd: float = 0.0
+    num_turns: int = 0
+    duration_ms: int = 0
+
+
+@dataclass(slots=True)
+class ResultEvent:
+    """The final result of a run."""
+    result: str
+    session_id: Optional[str] = None
+    permission_denials: list[dict] = field(default_factory=list)
+    usage: Optional[TokenUsage] = None
+
+
+@dataclass(slots=True)
+class OtherEvent:
+    """Any other message type (user/tool results, etc.)."""
+    type: str
+    session_id: Optional[str] = None
+
+
+StreamEvent = Union[SystemEvent, AssistantEvent, ResultEvent, OtherEvent]
+
+
+def decode_event(line: Union[str, bytes]) -> Optional[StreamEvent]:
+    """Decode one stream-json line. Returns None for blank or non-JSON lines."""
+    if not line.strip():
+        return None
+    try:
+        data = _loads(line)
+    except _DECODE_ERRORS:
+        return None
+    if not isinstance(data, dict):
+        return None
+    return event_from_dict(data)
+
+
+def event_from_dict(data: dict) -> StreamEvent:
+    """Reduce a decoded stream-json message to a typed event."""
+    msg_type = data.get("type", "unknown")
+    session_id = data.get("session_id")
+
+    if msg_type == "system":
+        return SystemEvent(subtype=data.get("subtype", ""), session_id=session_id)
+
+    if msg_type == "assistant":
+        return AssistantEvent(
+            content=extract_assistant_content(data),
+            session_id=session_id,
+        )
+
+    if msg_type == "result":
+        return ResultEvent(
+            result=data.get("result", "") or "",
+            session_id=session_id,
+            permission_denials=data.get("permission_denials", []) or [],
+            usage=extract_usage(data),
+        )
+
+    return OtherEvent(type=msg_type, session_id=session_id)
+
+
+def extract_usage(data: dict) -> Optional[TokenUsage]:
+    """Extract token usage and cost from a result message, if reported."""
+    usage = data.get("usage")
+    # Older CLI versions report cost_usd instead of total_cost_usd
+    cost = data.get("total_cost_usd", data.get("cost_usd"))
+    if not isinstance(usage, dict) and cost is None:
+        return None
+    usage = usage if isinstance(usage, dict) else {}
+
+    return TokenUsage(
+        input_tokens=usage.get("input_tokens") or 0,
+        output_tokens=usage.get("output_tokens") or 0,
+        cache_creation_input_tokens=usage.get("cache_creation_input_tokens") or 0,
+        cache_read_input_tokens=usage.get("cache_read_input_tokens") or 0,
+        cost_usd=float(cost or 0.0),
+        num_turns=data.get("num_turns") or 0,
+        duration_ms=data.get("duration_ms") or 0,
+    )
+
+
+def extract_assistant_content(data: dict) -> str:
+    """Extract text content from assistant message."""
+    message = data.get("message", {})
+    content_blocks = message.get("content", [])
+
+    text_parts = []
+    for block in content_blocks:
+        if isinstance(block, dict):
+            if block.get("type") == "text":
+                text_parts.append(block.get("text", ""))
+            elif block.get("type") == "tool_use":
+                tool_name = block.get("name", "unknown")
+                text_parts.append(f"[Using tool: {tool_name}]")
+
+    return "\n".join(text_parts)
@@ -0,0 +1,186 @@
+"""Durable task queue storage for Claude Code Telegram Bridge.
+
+Queued and running tasks are mirrored to SQLite in WAL mode, one row per
+task, so a restart can pick up where the bridge left off. Each enqueue,
+start and completion touches a single row; nothing is rewritten in bulk.
+
+Writes go to one background writer thread, in order, so callers on the
+event loop never wait for the disk. Row IDs are handed out up front so
+add() can return one without a round trip.
+"""
+
+import itertools
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DB = "queue.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_name TEXT NOT NULL,
+    chat_id INTEGER NOT NULL,
+    message_id INTEGER NOT NULL,
+    prompt TEXT NOT NULL,
+    image_paths TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    source_id TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    deadline REAL
+)
+"""
+
+# Columns added after the first release, for databases created before them
+_MIGRATIONS = {
+    "deadline": "ALTER TABLE tasks ADD COLUMN deadline REAL",
+}
+
+
+@dataclass
+class StoredTask:
+    """A task row as recovered from the store."""
+    task_id: int
+    project_name: str
+    chat_id: int
+    message_id: int
+    prompt: str
+    image_paths: list[str]
+    priority: str
+    kind: str
+    source_id: Optional[str]
+    state: str  # "pending" or "running"
+    created_at: float  # Unix time
+    deadline: Optional[float] = None  # Unix time after which it is dropped
+
+
+class TaskStore:
+    """SQLite store for queued tasks."""
+
+    def __init__(self, storage_path: str):
+        path = Path(storage_path)
+        path.mkdir(parents=True, exist_ok=True)
+        self.db_path = path / QUEUE_DB
+        # Autocommit; each statement is its own small transaction. Set up here,
+        # then used only from the writer thread.
+        self._conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps NORMAL durable against crashes of the bridge, not of the OS
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+        last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        self._ids = itertools.count(last_id + 1)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="task-store")
+
+    def _submit(self, func, *args) -> Future:
+        """Run func(*args) on the writer thread, after every earlier write."""
+        future = self._writer.submit(func, *args)
+        future.add_done_callback(self._log_failure)
+        return future
+
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        """Report a failed background write."""
+        if not future.cancelled() and future.exception():
+            logger.error(f"Task store write failed: {future.exception()}")
+
+    def add(
+        self,
+        project_name: str,
+        chat_id: int,
+        message_id: int,
+        prompt: str,
+        image_paths: list[str],
+        priority: str,
+        kind: str,
+        source_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> int:
+        """Store a pending task. Returns its ID at once; the row is written in the background."""
+        task_id = next(self._ids)
+        self._submit(
+            self._conn.execute,
+            "INSERT INTO tasks (id, project_name, chat_id, message_id, prompt, image_paths,"
+            " priority, kind, source_id, created_at, deadline)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                task_id, project_name, chat_id, message_id, prompt, json.dumps(image_paths),
+                priority, kind, source_id, created_at or time.time(), deadline,
+            ),
+        )
+        return task_id
+
+    def mark_running(self, task_id: int) -> None:
+        """Record that a task has started."""
+        self._submit(
+            self._conn.execute, "UPDATE tasks SET state = 'running' WHERE id = ?", (task_id,)
+        )
+
+    def fold(self, task_id: int, prompt: str, image_paths: list[str], folded_ids: list[int]) -> None:
+        """Replace folded tasks by the merged prompt of the task they joined."""
+        self._submit(self._fold, task_id, prompt, json.dumps(image_paths), folded_ids)
+
+    def _fold(self, task_id: int, prompt: str, image_paths: str, folded_ids: list[int]) -> None:
+        """Writer-thread half of fold(), in one transaction."""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                "UPDATE tasks SET prompt = ?, image_paths = ? WHERE id = ?",
+                (prompt, image_paths, task_id),
+            )
+            self._conn.executemany("DELETE FROM tasks WHERE id = ?", [(i,) for i in folded_ids])
+
+    def remove(self, task_id: int) -> None:
+        """Delete a finished, cancelled or dropped task."""
+        self._submit(self._conn.execute, "DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def load(self) -> list[StoredTask]:
+        """Get all stored tasks, oldest first. Blocks; meant for start-up."""
+        return self._submit(self._load).result()
+
+    def _load(self) -> list[StoredTask]:
+        """Writer-thread half of load(), after any pending writes."""
+        rows = self._conn.execute(
+            "SELECT id, project_name, chat_id, message_id, prompt, image_paths, priority,"
+            " kind, source_id, state, created_at, deadline FROM tasks ORDER BY id"
+        ).fetchall()
+        tasks = []
+        for row in rows:
+            try:
+                image_paths = json.loads(row[5])
+            except json.JSONDecodeError:
+                image_paths = []
+            tasks.append(StoredTask(
+                task_id=row[0],
+                project_name=row[1],
+                chat_id=row[2],
+                message_id=row[3],
+                prompt=row[4],
+                image_paths=image_paths,
+                priority=row[6],
+                kind=row[7],
+                source_id=row[8],
+                state=row[9],
+                created_at=row[10],
+                deadline=row[11],
+            ))
+        return tasks
+
+    def close(self) -> None:
+        """Finish pending writes and close the database. Blocks until done."""
+        self._writer.submit(self._conn.close)
+        self._writer.shutdown(wait=True)
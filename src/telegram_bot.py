@@ -1,9 +1,12 @@
 """Telegram bot handlers for Claude Code Bridge."""
 
+import asyncio
 import logging
 import tempfile
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, AsyncIterator, Optional
 
 from telegram import Update
 from telegram.ext import (
@@ -18,14 +21,23 @@ from telegram.ext import (
 from datetime import datetime
 
 from .approval_handler import ApprovalHandler
-from .claude_interface import ClaudeInterface, SAFE_TOOLS
+from .concurrency import FairShareLimiter
+from .claude_interface import ClaudeInterface, ClaudeResult, SAFE_TOOLS
 from .config import Config
 from .desktop_session_scanner import DesktopSessionScanner, DesktopSession
 from .message_router import MessageRouter, ParsedMessage
+from .metrics import Metrics
 from .output_processor import OutputProcessor
-from .queue_manager import QueuedTask, QueueManager
+from .permission_server import PermissionServer
+from .persistent_sessions import PersistentSessionManager
+from .progress_reporter import ProgressReporter
+from .queue_manager import QueuedTask, QueueManager, QueueRejected, TaskExpired
+from .resource_monitor import ResourceStats
 from .scheduled_task_manager import ScheduledTaskManager, ScheduledTask
 from .session_manager import SessionManager
+from .task_store import TaskStore
+from .usage_store import UsageStore
+from .worktree_pool import BRANCH_RETENTION_DAYS, GitError, Worktree, WorktreePool
 
 logger = logging.getLogger(__name__)
 
@@ -39,15 +51,58 @@ class TelegramBot:
         self.sessions = SessionManager(config.sessions.storage_path)
         self.claude = ClaudeInterface(
             executable=config.claude_code.executable,
+            pool_size=config.claude_code.warm_pool_size,
+            pool_idle_timeout=config.claude_code.session_idle_timeout,
+        )
+        self.persistent = PersistentSessionManager(
+            self.claude,
+            idle_timeout=config.claude_code.session_idle_timeout,
+        )
+        self.permission_server = (
+            PermissionServer() if config.claude_code.permission_server else None
         )
         self.output = OutputProcessor(config.outputs_path)
-        self.queue = QueueManager()
+        self.metrics = Metrics()
+        self.queue = QueueManager(
+            FairShareLimiter(
+                max_concurrent=config.queue.max_concurrent,
+                weights={name: proj.weight for name, proj in config.projects.items()},
+                aging_interval=config.queue.priority_aging,
+                metrics=self.metrics,
+            ),
+            aging_interval=config.queue.priority_aging,
+            coalesce_window=config.queue.coalesce_window,
+            store=TaskStore(config.sessions.storage_path) if config.queue.durable else None,
+            metrics=self.metrics,
+            max_depth=config.queue.max_depth,
+            max_total_depth=config.queue.max_total_depth,
+            suppress_duplicates=config.queue.suppress_duplicates,
+            on_expired=self._notify_expired,
+        )
+        for name, proj in config.projects.items():
+            self.queue.set_ttl(name, proj.task_ttl)
+        # Projects with a worktree pool run several tasks at once
+        self.worktrees: dict[str, WorktreePool] = {}
+        for name, proj in config.projects.items():
+            if proj.worktrees > 0:
+                self.worktrees[name] = WorktreePool(
+                    name,
+                    proj.path,
+                    root=str(Path(config.sessions.storage_path) / "worktrees"),
+                    size=proj.worktrees,
+                )
+                self.queue.set_lanes(name, proj.worktrees)
+        self.resource_stats = ResourceStats()
         self.approvals = ApprovalHandler()
         self.scheduler = ScheduledTaskManager(config.sessions.storage_path)
+        self.usage = UsageStore(config.sessions.storage_path)
         self.scanner = DesktopSessionScanner()
         # Stores (all_sessions, current_offset, friendly_names) for pagination
         self._pending_session_select: dict[int, tuple[list[DesktopSession], int, dict[str, str]]] = {}
         self.app: Application = None
+        # Attached-session runs, off the update handler; one at a time per chat
+        self._attached_tasks: set[asyncio.Task] = set()
+        self._attached_locks: dict[int, asyncio.Lock] = {}
 
     async def start(self) -> None:
         """Start the bot."""
@@ -63,6 +118,12 @@ class TelegramBot:
         self.app.add_handler(CommandHandler("projects", self._cmd_projects))
         self.app.add_handler(CommandHandler("new", self._cmd_new))
         self.app.add_handler(CommandHandler("skip", self._cmd_skip))
+        self.app.add_handler(CommandHandler("cancel", self._cmd_cancel))
+        self.app.add_handler(CommandHandler("queue", self._cmd_queue))
+        self.app.add_handler(CommandHandler("bump", self._cmd_bump))
+        self.app.add_handler(CommandHandler("resources", self._cmd_resources))
+        self.app.add_handler(CommandHandler("usage", self._cmd_usage))
+        self.app.add_handler(CommandHandler("stats", self._cmd_stats))
         self.app.add_handler(CommandHandler("addproject", self._cmd_addproject))
         self.app.add_handler(CommandHandler("removeproject", self._cmd_removeproject))
         self.app.add_handler(CommandHandler("project", self._cmd_project))
@@ -88,12 +149,28 @@ class TelegramBot:
         await self.app.start()
         await self.app.updater.start_polling()
 
+        if self.permission_server:
+            await self.permission_server.start()
+
         # Start the scheduled task manager
         await self.scheduler.start(self._execute_scheduled_task)
 
+        # Pick up tasks that were queued or running when the bridge stopped
+        await self._recover_queue()
+
     async def stop(self) -> None:
         """Stop the bot."""
         await self.scheduler.stop()
+        await self.queue.close()
+        for task in list(self._attached_tasks):
+            task.cancel()
+        await asyncio.gather(*self._attached_tasks, return_exceptions=True)
+        await self.persistent.close_all()
+        await self.claude.shutdown()
+        await self.sessions.close()
+        await self.usage.close()
+        if self.permission_server:
+            await self.permission_server.stop()
         if self.app:
             await self.app.updater.stop()
             await self.app.stop()
@@ -123,7 +200,8 @@ class TelegramBot:
             "/help - Show help\n"
             "/projects - List projects\n"
             "/new [#project] - Start new session\n"
-            "/skip - Skip current task"
+            "/skip - Skip current task\n"
+            "/cancel [#project] - Cancel running task"
         )
 
     async def _cmd_help(
@@ -145,19 +223,27 @@ class TelegramBot:
             "Usage:\n"
             "  Send a message to execute a task\n"
             "  Use #projectname prefix for specific project\n"
-            "  Send images with caption for visual tasks\n\n"
+            "  Send images with caption for visual tasks\n"
+            "  Start with ttl:30m to drop the task if not started in 30 min\n\n"
             "Commands:\n"
             "  /projects - List configured projects\n"
             "  /project [name] - View/set current project\n"
             "  /new [#project] - Reset session, start fresh\n"
-            "  /skip - Skip current errored task\n"
+            "  /skip - Stop the running task, start the next\n"
+            "  /cancel [#project] - Stop the running task for a project\n"
+            "  /cancel <id> - Drop a queued task, or stop it if running\n"
+            "  /queue [#project] - List running and queued tasks with IDs\n"
+            "  /bump <id> - Move a queued task to the front of its queue\n"
+            "  /resources - CPU, memory and wall time per project\n"
+            "  /usage [days] [chat] - Tokens and cost per project\n"
+            "  /stats - Queue wait, service time, latency and warm pool hits\n"
             "  /addproject name path - Add project\n"
             "  /removeproject name - Remove project\n\n"
             "Desktop sessions:\n"
             "  /sessions - List recent Claude Code desktop sessions\n"
             "  /detach - Detach from attached session\n\n"
             "Scheduled tasks:\n"
-            "  /schedule <type> <time> #project <prompt>\n"
+            "  /schedule [--batch] <type> <time> #project <prompt>\n"
             "  /tasks - List scheduled tasks\n"
             "  /deletetask <id> - Delete a task\n\n"
             f"Current project: #{current_project}\n"
@@ -241,6 +327,153 @@ class TelegramBot:
         if not skipped:
             await update.message.reply_text("No task currently running to skip.")
 
+    async def _cmd_cancel(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /cancel command - drop a task by ID, or kill the running task for a project."""
+        if not self._is_authorized(update):
+            return
+
+        args = context.args or []
+        if args and args[0].isdigit():
+            task_id = int(args[0])
+            task = self.queue.get_task(task_id)
+            outcome = self.queue.cancel(task_id)
+            if outcome == "queued":
+                await update.message.reply_text(f"Removed task {task_id} from #{task.project_name} queue")
+            elif outcome == "running":
+                await update.message.reply_text(f"Cancelled running task {task_id} for #{task.project_name}")
+            else:
+                await update.message.reply_text(f"No queued or running task {task_id}")
+            return
+
+        if args:
+            project_name = args[0].lower().lstrip("#")
+        else:
+            project_name = self.sessions.get_last_project(update.message.chat_id)
+
+        try:
+            resolved_name, _ = self.config.get_project(project_name)
+        except ValueError as e:
+            await update.message.reply_text(str(e))
+            return
+
+        if self.queue.skip_current(resolved_name):
+            await update.message.reply_text(f"Cancelled running task for #{resolved_name}")
+        else:
+            await update.message.reply_text(f"No task running for #{resolved_name}")
+
+    async def _cmd_queue(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /queue command - list running and queued tasks."""
+        if not self._is_authorized(update):
+            return
+
+        project_name = None
+        args = context.args or []
+        if args:
+            try:
+                project_name, _ = self.config.get_project(args[0].lower().lstrip("#"))
+            except ValueError as e:
+                await update.message.reply_text(str(e))
+                return
+
+        tasks = self.queue.get_tasks(project_name)
+        if not tasks:
+            await update.message.reply_text("No tasks running or queued.")
+            return
+
+        now = time.monotonic()
+        lines = ["Tasks (running first, then in queue order):"]
+        for task in tasks:
+            state = "running" if task.started_at is not None else task.priority
+            waited = (task.started_at or now) - task.enqueued_at
+            lines.append(
+                f"  [{task.task_id}] #{task.project_name} {state}, {waited:.0f}s: "
+                f"{task.prompt[:40]}{'...' if len(task.prompt) > 40 else ''}"
+            )
+        lines.append("\nUse /cancel <id> or /bump <id>")
+        await update.message.reply_text("\n".join(lines))
+
+    async def _cmd_bump(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /bump command - move a queued task to the front."""
+        if not self._is_authorized(update):
+            return
+
+        args = context.args or []
+        if not args or not args[0].isdigit():
+            await update.message.reply_text("Usage: /bump <id> (see /queue)")
+            return
+
+        task_id = int(args[0])
+        if self.queue.bump(task_id):
+            task = self.queue.get_task(task_id)
+            await update.message.reply_text(f"Task {task_id} is next for #{task.project_name}")
+        else:
+            await update.message.reply_text(f"No queued task {task_id}")
+
+    async def _cmd_resources(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /resources command - show resource usage per project."""
+        if not self._is_authorized(update):
+            return
+
+        await update.message.reply_text(self.resource_stats.format_totals())
+
+    async def _cmd_usage(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /usage command - show token usage and cost per project.
+
+        Usage: /usage [days] [chat]
+        """
+        if not self._is_authorized(update):
+            return
+
+        days = 1
+        chat_id = None
+        for arg in context.args or []:
+            if arg.isdigit() and int(arg) > 0:
+                days = int(arg)
+            elif arg.lower() == "chat":
+                chat_id = update.message.chat_id
+            else:
+                await update.message.reply_text("Usage: /usage [days] [chat]")
+                return
+
+        await update.message.reply_text(self.usage.format_rollup(days, chat_id))
+
+    async def _cmd_stats(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+    ) -> None:
+        """Handle /stats command - show queue and latency percentiles per project."""
+        if not self._is_authorized(update):
+            return
+
+        limiter = self.queue.limiter.get_stats()
+        budget = limiter.max_concurrent or "unlimited"
+        header = f"Run slots: {limiter.running}/{budget} busy, {limiter.waiting} waiting\n"
+        if self.claude.pool_size > 0:
+            pool = self.claude.get_pool_stats()
+            header += f"Warm pool: {pool['hits']} hit(s), {pool['misses']} miss(es), {pool['warm']} warm\n"
+        await update.message.reply_text(header + "\n" + self.metrics.format_summary())
+
     async def _cmd_addproject(
         self,
         update: Update,
@@ -345,10 +578,16 @@ class TelegramBot:
             return
 
         args = context.args or []
+        # Batch tasks yield to scheduled and interactive work when slots are full
+        priority = "scheduled"
+        if args and args[0] == "--batch":
+            priority = "batch"
+            args = args[1:]
+
         if len(args) < 3:
             await update.message.reply_text(
                 "Usage:\n"
-                "  /schedule once <datetime> #project <prompt>\n"
+                "  /schedule [--batch] once <datetime> #project <prompt>\n"
                 "  /schedule daily <HH:MM> #project <prompt>\n"
                 "  /schedule weekly <day> <HH:MM> #project <prompt>\n\n"
                 "Examples:\n"
@@ -433,11 +672,12 @@ class TelegramBot:
                 run_time=run_time,
                 time_of_day=time_of_day,
                 day_of_week=day_of_week,
+                priority=priority,
             )
 
             await update.message.reply_text(
                 f"Scheduled task created (ID: {task.task_id})\n"
-                f"Type: {schedule_type}\n"
+                f"Type: {schedule_type} ({priority})\n"
                 f"Project: #{project_name}\n"
                 f"Next run: {task.next_run}\n"
                 f"Prompt: {prompt[:50]}{'...' if len(prompt) > 50 else ''}"
@@ -552,7 +792,86 @@ class TelegramBot:
             await update.message.reply_text("Not attached to any desktop session.")
 
     async def _execute_scheduled_task(self, task: ScheduledTask) -> None:
-        """Execute a scheduled task - callback for ScheduledTaskManager."""
+        """Queue a due scheduled task - callback for ScheduledTaskManager."""
+        if task.project_name not in self.config.projects:
+            logger.error(f"Scheduled task {task.task_id}: project {task.project_name} not found")
+            return
+
+        queued = QueuedTask(
+            project_name=task.project_name,
+            prompt=task.prompt,
+            image_paths=[],
+            message_id=0,
+            chat_id=task.chat_id,
+            callback=lambda: None,  # Set by enqueue
+            priority=task.priority,
+            kind="scheduled",
+            source_id=task.task_id,
+        )
+        try:
+            await self.queue.enqueue(queued, lambda q: self._process_scheduled_task(task, q))
+        except QueueRejected as e:
+            await self.app.bot.send_message(
+                chat_id=task.chat_id,
+                text=f"⏰ Scheduled task {task.task_id} skipped: {e}",
+            )
+
+    async def _recover_queue(self) -> None:
+        """Re-queue tasks left in the durable queue by the previous run."""
+        recovered: dict[int, list[QueuedTask]] = {}
+        expired: dict[int, list[QueuedTask]] = {}
+        for task in self.queue.load_stored():
+            if task.project_name not in self.config.projects:
+                logger.warning(f"Dropping recovered task for removed project {task.project_name}")
+                self.queue.discard(task)
+                continue
+
+            # Interrupted tasks come back without a deadline, so they always restart
+            if task.is_expired():
+                logger.info(f"Dropping recovered task {task.task_id}: expired while stopped")
+                self.queue.discard(task)
+                expired.setdefault(task.chat_id, []).append(task)
+                continue
+
+            if task.kind == "scheduled":
+                scheduled = self.scheduler.get_task(task.source_id)
+                if scheduled is None:
+                    self.queue.discard(task)
+                    continue
+                processor = lambda q, s=scheduled: self._process_scheduled_task(s, q)
+            else:
+                processor = self._process_task
+
+            await self.queue.enqueue(task, processor)
+            recovered.setdefault(task.chat_id, []).append(task)
+
+        def describe(task: QueuedTask, note: str = "") -> str:
+            return (
+                f"  #{task.project_name}: {task.prompt[:40]}"
+                f"{'...' if len(task.prompt) > 40 else ''}{note}"
+            )
+
+        for chat_id in {**recovered, **expired}:
+            lines = []
+            tasks = recovered.get(chat_id, [])
+            if tasks:
+                lines.append(f"Bridge restarted, re-queued {len(tasks)} task(s):")
+                for task in tasks:
+                    note = " (was running, starting again)" if task.interrupted else ""
+                    lines.append(describe(task, note))
+            tasks = expired.get(chat_id, [])
+            if tasks:
+                if lines:
+                    lines.append("")
+                lines.append(
+                    f"{'Dropped' if lines else 'Bridge restarted, dropped'} {len(tasks)} task(s) "
+                    f"whose deadline passed while the bridge was down:"
+                )
+                lines.extend(describe(task) for task in tasks)
+            await self.app.bot.send_message(chat_id=chat_id, text="\n".join(lines))
+
+    async def _process_scheduled_task(self, task: ScheduledTask, queued: QueuedTask) -> None:
+        """Run a scheduled task once its turn in the project queue comes."""
         project_config = self.config.projects.get(task.project_name)
         if not project_config:
             logger.error(f"Scheduled task {task.task_id}: project {task.project_name} not found")
@@ -566,21 +885,27 @@ class TelegramBot:
                  f"Prompt: {task.prompt[:50]}{'...' if len(task.prompt) > 50 else ''}",
         )
 
-        # Get existing session
-        session_id = self.sessions.get_session_id(task.project_name)
+        async with self._workspace(queued) as worktree:
+            # Get existing session
+            session_key = self._session_key(task.project_name, worktree)
+            session_id = self.sessions.get_session_id(session_key)
+
+            # Execute (simplified - no approval flow for scheduled tasks, uses safe mode)
+            result = await self._run_claude(
+                queued,
+                persistent_key=f"{task.project_name}:{worktree.name}" if worktree else None,
+                prompt=task.prompt,
+                working_dir=str(worktree.path) if worktree else project_config.path,
+                session_id=session_id,
+                approval_mode="safe",
+                allowed_tools=None,
+            )
 
-        # Execute (simplified - no approval flow for scheduled tasks, uses safe mode)
-        result = await self.claude.execute(
-            prompt=task.prompt,
-            working_dir=project_config.path,
-            session_id=session_id,
-            approval_mode="safe",
-            allowed_tools=None,
-        )
+            # Save session ID
+            if result.session_id:
+                self.sessions.set_session_id(session_key, result.session_id)
 
-        # Save session ID
-        if result.session_id:
-            self.sessions.set_session_id(task.project_name, result.session_id)
+            merge_note = await self._merge_worktree(queued, worktree, result) if worktree else None
 
         # Process and send output
         message_text, file_path = self.output.process(
@@ -589,6 +914,8 @@ class TelegramBot:
             success=result.success,
             error=result.error,
         )
+        if merge_note:
+            message_text += f"\n\n{merge_note}"
 
         await self.app.bot.send_message(
             chat_id=task.chat_id,
@@ -671,7 +998,11 @@ class TelegramBot:
         # Check if attached to a desktop session
         attached = self.sessions.get_attached_session(chat_id)
         if attached:
-            await self._process_attached_message(message, text)
+            # Updates are handled one at a time, so waiting for a run slot here
+            # would stall every update, including the /skip and /cancel that free one
+            task = asyncio.create_task(self._process_attached_message(message, text))
+            self._attached_tasks.add(task)
+            task.add_done_callback(self._attached_tasks.discard)
             return
 
         # Download any photos
@@ -708,14 +1039,19 @@ class TelegramBot:
             image_paths=parsed.image_paths,
             message_id=message.message_id,
             chat_id=message.chat_id,
-            callback=lambda: None,  # Set by processor
+            callback=lambda: None,  # Set by enqueue
+            deadline=time.monotonic() + parsed.ttl if parsed.ttl else None,
         )
 
         # Enqueue task
-        position = await self.queue.enqueue(task, self._process_task)
+        try:
+            position = await self.queue.enqueue(task, self._process_task)
+        except QueueRejected as e:
+            await message.reply_text(str(e))
+            return
 
         # Send queue position
-        status_msg = self.output.format_queue_position(position, parsed.project_name)
+        status_msg = self.output.format_queue_position(position, parsed.project_name, task.task_id)
         await message.reply_text(status_msg)
 
     async def _process_task(self, task: QueuedTask) -> None:
@@ -729,65 +1065,93 @@ class TelegramBot:
             paths_str = ", ".join(task.image_paths)
             prompt = f"{prompt}\n\n[Images attached: {paths_str}]"
 
-        # Get existing session
-        session_id = self.sessions.get_session_id(project_name)
-
-        # Track allowed tools for ask-all mode
-        allowed_tools: list[str] = []
-
-        while True:
-            # Execute Claude
-            result = await self.claude.execute(
-                prompt=prompt,
-                working_dir=project_config.path,
-                session_id=session_id,
-                approval_mode=project_config.approval_mode,
-                allowed_tools=allowed_tools if allowed_tools else None,
-            )
-
-            # Save session ID
-            if result.session_id:
-                self.sessions.set_session_id(project_name, result.session_id)
-
-            # Check for permission denials (ask-all mode)
-            if result.permission_denials and project_config.approval_mode == "ask-all":
-                denial = result.permission_denials[0]
-                tool_name = denial.get("tool", "unknown")
-                tool_input = denial.get("input", {})
-
-                # Send approval request
-                approval_msg = self.approvals.format_approval_message(
-                    tool_name, tool_input, project_name
-                )
-                sent = await self.app.bot.send_message(
-                    chat_id=task.chat_id,
-                    text=approval_msg,
-                    reply_markup=self.approvals.create_keyboard(),
+        async with self._workspace(task) as worktree:
+            # Sessions are tied to their directory, so each worktree has its own
+            session_key = self._session_key(project_name, worktree)
+            session_id = self.sessions.get_session_id(session_key)
+            working_dir = str(worktree.path) if worktree else project_config.path
+            run_key = f"{project_name}:{worktree.name}" if worktree else project_name
+
+            # Answer permission prompts mid-run when the permission server is enabled
+            permission_prompt_config = None
+            if self.permission_server and project_config.approval_mode in ("safe", "ask-all"):
+                permission_prompt_config = self.permission_server.register(
+                    run_key,
+                    lambda tool_name, tool_input: self._ask_approval(task, tool_name, tool_input),
                 )
 
-                # Wait for approval
-                approved = await self.approvals.request_approval(
-                    project_name=project_name,
-                    tool_name=tool_name,
-                    tool_input=tool_input,
-                    message_id=sent.message_id,
-                    chat_id=task.chat_id,
-                )
-
-                if approved:
-                    # Add tool to allowed list and re-run
-                    allowed_tools.append(tool_name)
-                    continue
-                else:
-                    # Report denial and stop
-                    await self.app.bot.send_message(
-                        chat_id=task.chat_id,
-                        text=f"Permission denied for {tool_name}. Task stopped.",
+            try:
+                # Track allowed tools for ask-all mode
+                allowed_tools: list[str] = []
+                approval_rounds = 0
+                rerun_seconds = 0.0
+
+                while True:
+                    # Execute Claude
+                    started = time.monotonic()
+                    result = await self._run_claude(
+                        task,
+                        persistent_key=run_key,
+                        prompt=prompt,
+                        working_dir=working_dir,
+                        session_id=session_id,
+                        approval_mode=project_config.approval_mode,
+                        allowed_tools=allowed_tools if allowed_tools else None,
+                        permission_prompt_config=permission_prompt_config,
                     )
-                    return
-
-            # No more permission requests, process output
-            break
+                    if approval_rounds:
+                        rerun_seconds += time.monotonic() - started
+
+                    # Save session ID
+                    if result.session_id:
+                        self.sessions.set_session_id(session_key, result.session_id)
+
+                    # Check for permission denials (ask-all mode)
+                    if result.permission_denials and project_config.approval_mode == "ask-all":
+                        # Collect every distinct tool denied in this run into one round
+                        requests: dict[str, dict] = {}
+                        for denial in result.permission_denials:
+                            tool_name = denial.get("tool_name") or denial.get("tool", "unknown")
+                            if tool_name not in allowed_tools and tool_name not in requests:
+                                requests[tool_name] = denial.get("tool_input") or denial.get("input", {})
+
+                        if not requests:
+                            # Everything denied was already allowed; re-running won't help
+                            logger.warning(f"Denials repeated for already-allowed tools in {project_name}")
+                            break
+
+                        approval_rounds += 1
+                        decisions = await asyncio.gather(*(
+                            self._ask_approval(task, tool_name, tool_input)
+                            for tool_name, tool_input in requests.items()
+                        ))
+                        denied = [name for name, ok in zip(requests, decisions) if not ok]
+
+                        if denied:
+                            # Report denial and stop
+                            await self.app.bot.send_message(
+                                chat_id=task.chat_id,
+                                text=f"Permission denied for {', '.join(denied)}. Task stopped.",
+                            )
+                            return
+
+                        # Merge the approved set and re-run once
+                        allowed_tools.extend(requests)
+                        continue
+
+                    # No more permission requests, process output
+                    break
+            finally:
+                if permission_prompt_config:
+                    self.permission_server.unregister(run_key)
+
+            merge_note = await self._merge_worktree(task, worktree, result) if worktree else None
+
+        if approval_rounds:
+            logger.info(
+                f"Task for {project_name}: {approval_rounds} approval round(s), "
+                f"{rerun_seconds:.1f}s re-running"
+            )
 
         # Process and send output
         message_text, file_path = self.output.process(
@@ -797,11 +1161,28 @@ class TelegramBot:
             error=result.error,
         )
 
+        if approval_rounds:
+            message_text += (
+                f"\n\n[{approval_rounds} approval round(s), "
+                f"{rerun_seconds:.1f}s re-running]"
+            )
+
+        if task.folded_prompts:
+            folded = "; ".join(
+                f'"{p[:40]}{"..." if len(p) > 40 else ""}"' for p in task.folded_prompts
+            )
+            message_text += f"\n\n[Also answered {len(task.folded_prompts)} follow-up(s): {folded}]"
+
+        if merge_note:
+            message_text += f"\n\n{merge_note}"
+
         # Send result
         await self.app.bot.send_message(
             chat_id=task.chat_id,
             text=message_text,
         )
+        if result.result_at is not None:
+            self.metrics.record("result_to_send", project_name, time.monotonic() - result.result_at)
 
         # Send file if created
         if file_path:
@@ -812,8 +1193,154 @@ class TelegramBot:
                     filename=file_path.name,
                 )
 
+    @asynccontextmanager
+    async def _workspace(self, task: QueuedTask) -> AsyncIterator[Optional[Worktree]]:
+        """Hold a worktree for the task if its project has a pool, else yield None."""
+        pool = self.worktrees.get(task.project_name)
+        if pool is None:
+            yield None
+            return
+        async def on_unfinished(branch: str) -> None:
+            await self.app.bot.send_message(
+                chat_id=task.chat_id,
+                text=(
+                    f"[#{task.project_name}: unfinished changes left on branch {branch}, "
+                    f"deleted after {BRANCH_RETENTION_DAYS} days]"
+                ),
+            )
+
+        try:
+            async with pool.checkout(str(task.task_id or task.message_id), on_unfinished) as worktree:
+                yield worktree
+        except GitError as e:
+            logger.error(f"Worktree error for {task.project_name}: {e}")
+            await self.app.bot.send_message(
+                chat_id=task.chat_id,
+                text=f"Worktree error for #{task.project_name}: {e}",
+            )
+            raise
+
+    @staticmethod
+    def _session_key(project_name: str, worktree: Optional[Worktree]) -> str:
+        """Get the SessionManager key for a run in the project or one of its worktrees."""
+        return f"{project_name}@{worktree.name}" if worktree else project_name
+
+    async def _merge_worktree(self, task: QueuedTask, worktree: Worktree, result: ClaudeResult) -> str:
+        """Merge a finished task's worktree branch back. Returns a note for the reply."""
+        first_line = task.prompt.strip().splitlines()[0] if task.prompt.strip() else "Task"
+        message = f"{first_line[:72]}\n\nFrom Telegram via #{task.project_name} ({worktree.name})"
+        if not result.success:
+            message = f"Failed task: {message}"
+        try:
+            report = await self.worktrees[task.project_name].merge_back(worktree, message)
+        except GitError as e:
+            logger.error(f"Merging {worktree.branch} for {task.project_name} failed: {e}")
+            return f"[Worktree {worktree.name}: merge failed - {e}]"
+        return report.format()
+
+    async def _notify_expired(self, task: QueuedTask) -> None:
+        """Tell the chat a task was dropped because its deadline passed."""
+        waited = time.monotonic() - task.enqueued_at
+        waited_text = f"{waited / 60:.0f} min" if waited >= 60 else f"{waited:.0f}s"
+        await self.app.bot.send_message(
+            chat_id=task.chat_id,
+            text=f"Dropped task {task.task_id} for #{task.project_name}: not started within "
+                 f"its deadline (waited {waited_text}).\n"
+                 f"Prompt: {task.prompt[:50]}{'...' if len(task.prompt) > 50 else ''}",
+        )
+
+    async def _ask_approval(self, task: QueuedTask, tool_name: str, tool_input: dict) -> bool:
+        """Send an approval request for one tool and wait for the answer."""
+        approval_msg = self.approvals.format_approval_message(
+            tool_name, tool_input, task.project_name
+        )
+        sent = await self.app.bot.send_message(
+            chat_id=task.chat_id,
+            text=approval_msg,
+            reply_markup=self.approvals.create_keyboard(),
+        )
+
+        return await self.approvals.request_approval(
+            project_name=task.project_name,
+            tool_name=tool_name,
+            tool_input=tool_input,
+            message_id=sent.message_id,
+            chat_id=task.chat_id,
+        )
+
+    async def _run_claude(
+        self, task: QueuedTask, persistent_key: Optional[str] = None, **kwargs
+    ) -> ClaudeResult:
+        """Run Claude for a task, with a live progress message if enabled.
+
+        persistent_key selects the persistent process (default: the project).
+        """
+        claude_config = self.config.claude_code
+
+        reporter = None
+        if claude_config.live_progress:
+            reporter = ProgressReporter(
+                self.app.bot,
+                chat_id=task.chat_id,
+                header=f"#{task.project_name}: {task.prompt[:50]}{'...' if len(task.prompt) > 50 else ''}",
+                min_interval=claude_config.progress_interval,
+            )
+            await reporter.start()
+
+        on_update = reporter.on_update if reporter else None
+        try:
+            async with self.queue.limiter.slot(task.project_name, task.priority, task.enqueued_at):
+                # The wait for a slot may have outlived the task
+                if task.is_expired():
+                    raise TaskExpired(f"Task {task.task_id} expired waiting for a run slot")
+                # Once running, follow-up runs (approval rounds) are never obsolete
+                task.deadline = None
+                if claude_config.persistent_sessions:
+                    result = await self.persistent.execute(
+                        persistent_key or task.project_name, on_update=on_update, **kwargs
+                    )
+                elif reporter:
+                    result = await self.claude.execute_streaming(on_update=on_update, **kwargs)
+                else:
+                    result = await self.claude.execute(**kwargs)
+        except asyncio.CancelledError:
+            if reporter:
+                await reporter.finish("Cancelled")
+            raise
+        except TaskExpired:
+            if reporter:
+                await reporter.finish("Expired")
+            raise
+
+        if result.resources:
+            self.resource_stats.record(task.project_name, result.resources, result.stderr_bytes)
+        if result.usage:
+            self.usage.record(task.project_name, task.chat_id, result.usage)
+
+        if reporter:
+            if result.error:
+                await reporter.finish("Failed")
+            elif result.permission_denials:
+                await reporter.finish("Waiting for approval")
+            else:
+                await reporter.finish("Done")
+        return result
+
     async def _process_attached_message(self, message, text: str) -> None:
-        """Process a message for an attached desktop session."""
+        """Process a message for an attached desktop session, in the background."""
+        lock = self._attached_locks.setdefault(message.chat_id, asyncio.Lock())
+        try:
+            # Keep the chat's turns on the resumed session in order
+            async with lock:
+                await self._run_attached_message(message, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Attached session message failed: {e}")
+            await message.reply_text(f"Error: {e}")
+
+    async def _run_attached_message(self, message, text: str) -> None:
+        """Run one message on the attached desktop session and send the result."""
         chat_id = message.chat_id
         attached = self.sessions.get_attached_session(chat_id)
 
@@ -829,13 +1356,21 @@ class TelegramBot:
         await message.reply_text(f"[Attached: {project_path}]\nProcessing...")
 
         # Execute with --resume pointing to the desktop session
-        result = await self.claude.execute(
+        run_kwargs = dict(
             prompt=text,
             working_dir=project_path,
             session_id=session_id,
             approval_mode="safe",  # Use safe mode for attached sessions
             allowed_tools=None,
         )
+        async with self.queue.limiter.slot(f"attached:{chat_id}"):
+            if self.config.claude_code.persistent_sessions:
+                result = await self.persistent.execute(f"attached:{chat_id}", **run_kwargs)
+            else:
+                result = await self.claude.execute(**run_kwargs)
+
+        if result.usage:
+            self.usage.record(Path(project_path).name, chat_id, result.usage)
 
         # Check if session was not found (file deleted, etc.)
         if result.error and "session" in result.error.lower():
@@ -861,6 +1396,8 @@ class TelegramBot:
             chat_id=chat_id,
             text=message_text,
         )
+        if result.result_at is not None:
+            self.metrics.record("result_to_send", display_name, time.monotonic() - result.result_at)
 
         # Send file if created
         if file_path:
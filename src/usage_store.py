@@ -0,0 +1,239 @@
+"""Token usage and cost accounting for Claude Code Telegram Bridge.
+
+Usage from each run's result event is folded into a rollup keyed by day,
+project and chat, kept in memory and mirrored to a single small JSON file.
+Only the last RETENTION_DAYS days are kept, so the file stays small; it is
+rewritten in a worker thread, at most once every SAVE_DELAY seconds.
+/usage reads the rollup; history is never rescanned.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, fields
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional
+
+from .stream_events import TokenUsage
+
+logger = logging.getLogger(__name__)
+
+USAGE_FILE = "usage.json"
+
+# Days of history kept (and the longest period /usage can show)
+RETENTION_DAYS = 90
+
+# Seconds to gather runs before rewriting the file
+SAVE_DELAY = 5.0
+
+
+@dataclass
+class UsageTotals:
+    """Summed usage for one rollup bucket."""
+    runs: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def add(self, other: "UsageTotals") -> None:
+        """Add another bucket into this one."""
+        for f in fields(self):
+            setattr(self, f.name, getattr(self, f.name) + getattr(other, f.name))
+
+    def to_row(self) -> list:
+        """Encode as a compact list for storage."""
+        return [getattr(self, f.name) for f in fields(self)]
+
+    @classmethod
+    def from_row(cls, row: list) -> "UsageTotals":
+        """Decode a stored row, tolerating missing trailing columns."""
+        return cls(*row[:len(fields(cls))])
+
+
+class UsageStore:
+    """Rollup of token usage per day, project and chat."""
+
+    def __init__(self, storage_path: str):
+        self.storage_path = Path(storage_path)
+        self.storage_path.mkdir(parents=True, exist_ok=True)
+        self._file = self.storage_path / USAGE_FILE
+        # day (ISO date) -> project -> chat_id (str) -> totals
+        self._days: dict[str, dict[str, dict[str, UsageTotals]]] = {}
+        self._save_timer: Optional[asyncio.TimerHandle] = None
+        self._save_lock: Optional[asyncio.Lock] = None
+        self._save_tasks: set[asyncio.Task] = set()
+        self._dirty = False
+        self._load()
+        self._prune()
+
+    def _load(self) -> None:
+        """Load the rollup from disk."""
+        if not self._file.exists():
+            return
+        try:
+            with open(self._file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for day, projects in data.get("days", {}).items():
+                self._days[day] = {
+                    project: {chat: UsageTotals.from_row(row) for chat, row in chats.items()}
+                    for project, chats in projects.items()
+                }
+        except (json.JSONDecodeError, IOError, TypeError) as e:
+            logger.error(f"Failed to load usage rollup: {e}")
+
+    def _prune(self, today: Optional[date] = None) -> None:
+        """Drop days older than the retention window."""
+        first_day = ((today or date.today()) - timedelta(days=RETENTION_DAYS - 1)).isoformat()
+        for day in [day for day in self._days if day < first_day]:
+            del self._days[day]
+            self._dirty = True
+
+    def _serialize(self) -> str:
+        """Encode the rollup as compact JSON."""
+        data = {
+            "days": {
+                day: {
+                    project: {chat: totals.to_row() for chat, totals in chats.items()}
+                    for project, chats in projects.items()
+                }
+                for day, projects in self._days.items()
+            }
+        }
+        return json.dumps(data, separators=(",", ":"))
+
+    def _write(self, contents: str) -> None:
+        """Write the serialized rollup to disk atomically."""
+        tmp_file = self._file.with_suffix(".tmp")
+        try:
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                f.write(contents)
+            os.replace(tmp_file, self._file)
+        except IOError as e:
+            logger.error(f"Failed to save usage rollup: {e}")
+
+    def _schedule_save(self) -> None:
+        """Mark the rollup changed and arrange for it to be written."""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (scripts): nothing to block, write now
+            self._dirty = False
+            self._write(self._serialize())
+            return
+        if self._save_timer is None:
+            self._save_timer = loop.call_later(SAVE_DELAY, self._start_save)
+
+    def _start_save(self) -> None:
+        """Timer callback: write the rollup in the background."""
+        self._save_timer = None
+        task = asyncio.create_task(self.flush())
+        self._save_tasks.add(task)
+        task.add_done_callback(self._save_tasks.discard)
+
+    async def flush(self) -> None:
+        """Write pending changes now, off the event loop."""
+        if self._save_timer:
+            self._save_timer.cancel()
+            self._save_timer = None
+        if self._save_lock is None:
+            self._save_lock = asyncio.Lock()
+        # One write at a time, so an older snapshot never replaces a newer one
+        async with self._save_lock:
+            if self._dirty:
+                self._dirty = False
+                await asyncio.to_thread(self._write, self._serialize())
+
+    async def close(self) -> None:
+        """Flush pending changes; call before shutdown."""
+        await self.flush()
+
+    def record(
+        self,
+        project_name: str,
+        chat_id: int,
+        usage: TokenUsage,
+        day: Optional[date] = None,
+    ) -> None:
+        """Add one run's usage to the rollup."""
+        day_key = (day or date.today()).isoformat()
+        if day_key not in self._days:
+            # First run of a new day: a good moment to drop expired history
+            self._prune(day)
+        chats = self._days.setdefault(day_key, {}).setdefault(project_name, {})
+        totals = chats.setdefault(str(chat_id), UsageTotals())
+        totals.add(UsageTotals(
+            runs=1,
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_creation_input_tokens=usage.cache_creation_input_tokens,
+            cache_read_input_tokens=usage.cache_read_input_tokens,
+            cost_usd=usage.cost_usd,
+        ))
+        self._schedule_save()
+
+    def get_rollup(
+        self,
+        days: int = 1,
+        chat_id: Optional[int] = None,
+    ) -> dict[str, UsageTotals]:
+        """Get usage per project over the last ``days`` days (today included).
+
+        Args:
+            days: Number of days to include, at most RETENTION_DAYS
+            chat_id: Only count runs from this chat, if set
+
+        Returns:
+            Totals per project, most expensive first
+        """
+        today = date.today()
+        chat_key = str(chat_id) if chat_id is not None else None
+
+        rollup: dict[str, UsageTotals] = {}
+        # Look up only the requested days rather than scanning all of them
+        for offset in range(min(days, RETENTION_DAYS)):
+            projects = self._days.get((today - timedelta(days=offset)).isoformat())
+            if not projects:
+                continue
+            for project, chats in projects.items():
+                for chat, totals in chats.items():
+                    if chat_key is not None and chat != chat_key:
+                        continue
+                    rollup.setdefault(project, UsageTotals()).add(totals)
+
+        return dict(sorted(rollup.items(), key=lambda item: item[1].cost_usd, reverse=True))
+
+    def format_rollup(self, days: int = 1, chat_id: Optional[int] = None) -> str:
+        """Format the rollup for a Telegram message."""
+        days = min(days, RETENTION_DAYS)
+        period = "today" if days == 1 else f"last {days} days"
+        scope = " (this chat)" if chat_id is not None else ""
+        rollup = self.get_rollup(days, chat_id)
+        if not rollup:
+            return f"No usage recorded {period}{scope}."
+
+        total = UsageTotals()
+        lines = [f"Usage {period}{scope}:\n"]
+        for project, totals in rollup.items():
+            total.add(totals)
+            lines.append(f"#{project} - {totals.runs} run(s), ${totals.cost_usd:.2f}")
+            lines.append(
+                f"  {_tokens(totals.input_tokens)} in, {_tokens(totals.output_tokens)} out, "
+                f"{_tokens(totals.cache_read_input_tokens)} cache read, "
+                f"{_tokens(totals.cache_creation_input_tokens)} cache write"
+            )
+        lines.append(f"\nTotal: {total.runs} run(s), ${total.cost_usd:.2f}")
+        return "\n".join(lines)
+
+
+def _tokens(count: int) -> str:
+    """Format a token count compactly (e.g. 12.3k)."""
+    if count >= 1_000_000:
+        return f"{count / 1_000_000:.1f}M"
+    if count >= 1_000:
+        return f"{count / 1_000:.1f}k"
+    return str(count)
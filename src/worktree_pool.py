@@ -0,0 +1,265 @@
+"""Git worktree pool for Claude Code Telegram Bridge.
+
+A project normally runs one task at a time because every run shares the
+project directory. With a worktree pool, each task checks out a fresh
+branch from the project's HEAD in its own git worktree, so several tasks
+of one project can run at once. When a task finishes its changes are
+committed on that branch and merged back into the project checkout:
+fast-forward when possible, otherwise a merge commit. Work that cannot be
+merged cleanly is left on its branch for the user to pick up, as is the
+work of a run that did not finish; such branches are deleted after
+BRANCH_RETENTION_DAYS days.
+
+Each worktree keeps its own Claude session (stored as "<project>@wtN"),
+since sessions are tied to the directory they ran in. A follow-up message
+continues the conversation of whichever worktree picks it up.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+BRANCH_PREFIX = "bridge"
+
+# Days to keep task branches that were left unmerged
+BRANCH_RETENTION_DAYS = 14
+
+# Identity used for task commits when the repo has none configured
+_FALLBACK_IDENTITY = ["-c", "user.name=Claude Code Telegram Bridge", "-c", "user.email=bridge@localhost"]
+
+
+class GitError(Exception):
+    """A git command failed."""
+
+
+@dataclass
+class Worktree:
+    """One checkout in the pool."""
+    name: str  # e.g. "wt1"
+    path: Path
+    branch: Optional[str] = None  # Branch of the task currently using it
+    base: Optional[str] = None  # Commit the branch started from
+
+
+@dataclass
+class MergeReport:
+    """Outcome of merging a task branch back."""
+    worktree: str
+    branch: str
+    status: str  # "merged", "no_changes", "left"
+    commits: int = 0
+    files: list[str] = field(default_factory=list)
+    reason: Optional[str] = None  # Why the branch was left unmerged
+
+    def format(self) -> str:
+        """Format the report for a Telegram message."""
+        if self.status == "no_changes":
+            return f"[Worktree {self.worktree}: no changes]"
+        files = f", {len(self.files)} file(s)" if self.files else ""
+        if self.status == "merged":
+            return f"[Worktree {self.worktree}: merged {self.branch} ({self.commits} commit(s){files})]"
+        return (
+            f"[Worktree {self.worktree}: changes left on branch {self.branch} "
+            f"({self.commits} commit(s){files}) - {self.reason}]"
+        )
+
+
+async def run_git(cwd: Path, *args: str, check: bool = True) -> tuple[int, str]:
+    """Run a git command. Returns (exit code, combined output)."""
+    process = await asyncio.create_subprocess_exec(
+        "git", *args,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+    )
+    stdout, _ = await process.communicate()
+    output = stdout.decode("utf-8", errors="replace").strip()
+    if check and process.returncode != 0:
+        raise GitError(f"git {' '.join(args)} failed: {output}")
+    return process.returncode, output
+
+
+class WorktreePool:
+    """A fixed set of git worktrees for one project."""
+
+    def __init__(self, project_name: str, repo_path: str, root: str, size: int):
+        """Create a pool. Worktrees are created lazily on first use.
+
+        Args:
+            project_name: Project the pool belongs to
+            repo_path: The project's main checkout
+            root: Directory to hold the worktrees
+            size: Number of worktrees
+        """
+        self.project_name = project_name
+        self.repo_path = Path(repo_path).resolve()
+        # Project name made safe for paths and branch names
+        self._slug = re.sub(r"[^\w.-]", "-", project_name)
+        self.root = Path(root).resolve() / self._slug
+        self.size = max(1, size)
+        self._free: asyncio.Queue[Worktree] = asyncio.Queue()
+        self._setup_lock = asyncio.Lock()
+        self._ready = False
+        # Merges touch the main checkout, one at a time
+        self._merge_lock = asyncio.Lock()
+        self._identity: list[str] = []
+
+    async def _setup(self) -> None:
+        """Create (or reuse) the worktrees."""
+        async with self._setup_lock:
+            if self._ready:
+                return
+            await run_git(self.repo_path, "rev-parse", "--git-dir")
+            # Forget worktrees whose directories were deleted
+            await run_git(self.repo_path, "worktree", "prune")
+            code, _ = await run_git(self.repo_path, "config", "user.email", check=False)
+            self._identity = [] if code == 0 else _FALLBACK_IDENTITY
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            for i in range(1, self.size + 1):
+                worktree = Worktree(name=f"wt{i}", path=self.root / f"wt{i}")
+                if not (worktree.path / ".git").exists():
+                    await run_git(
+                        self.repo_path, "worktree", "add", "--detach", str(worktree.path), "HEAD"
+                    )
+                    logger.info(f"#{self.project_name}: created worktree {worktree.path}")
+                self._free.put_nowait(worktree)
+            self._ready = True
+        await self._prune_branches()
+
+    @asynccontextmanager
+    async def checkout(
+        self,
+        label: str,
+        on_unfinished: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> AsyncIterator[Worktree]:
+        """Hold a worktree on a new branch from the project's HEAD.
+
+        Args:
+            label: Short identifier for the branch name (e.g. the task ID)
+            on_unfinished: Called with the branch name when the block exits
+                without merge_back() and left changes on the branch
+        """
+        await self._setup()
+        worktree = await self._free.get()
+        try:
+            _, base = await run_git(self.repo_path, "rev-parse", "HEAD")
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            branch = f"{BRANCH_PREFIX}/{self._slug}/{stamp}-{label}"
+            await self._clean(worktree)
+            await run_git(worktree.path, "checkout", "-B", branch, base)
+            worktree.branch = branch
+            worktree.base = base
+            yield worktree
+        finally:
+            if worktree.branch:
+                branch = worktree.branch
+                left = False
+                try:
+                    left = await self._save_unfinished(worktree)
+                except GitError as e:
+                    logger.warning(f"#{self.project_name}: could not save {branch}: {e}")
+                worktree.branch = None
+                self._free.put_nowait(worktree)
+                if left and on_unfinished:
+                    try:
+                        await on_unfinished(branch)
+                    except Exception as e:
+                        logger.warning(f"#{self.project_name}: unfinished-branch callback failed: {e}")
+            else:
+                self._free.put_nowait(worktree)
+
+    async def merge_back(self, worktree: Worktree, message: str) -> MergeReport:
+        """Commit a task's changes and merge its branch into the project checkout."""
+        branch = worktree.branch
+        await self._commit(worktree, message)
+        # Detach so the branch can be deleted once merged
+        worktree.branch = None
+        await run_git(worktree.path, "checkout", "--detach")
+
+        _, count = await run_git(worktree.path, "rev-list", "--count", f"{worktree.base}..{branch}")
+        if int(count or 0) == 0:
+            await run_git(self.repo_path, "branch", "-D", branch)
+            return MergeReport(worktree.name, branch, "no_changes")
+
+        _, names = await run_git(worktree.path, "diff", "--name-only", worktree.base, branch)
+        report = MergeReport(
+            worktree.name, branch, "left", commits=int(count), files=names.splitlines()
+        )
+
+        async with self._merge_lock:
+            code, current = await run_git(
+                self.repo_path, "symbolic-ref", "--short", "-q", "HEAD", check=False
+            )
+            if code != 0:
+                report.reason = "project checkout has a detached HEAD"
+                return report
+
+            code, _ = await run_git(self.repo_path, "merge", "--ff-only", branch, check=False)
+            if code != 0:
+                # HEAD moved on (another task merged first); needs a real merge
+                _, status = await run_git(self.repo_path, "status", "--porcelain", "--untracked-files=no")
+                if status:
+                    report.reason = "project checkout has uncommitted changes"
+                    return report
+                code, output = await run_git(
+                    self.repo_path, *self._identity, "merge", "--no-edit", branch, check=False
+                )
+                if code != 0:
+                    await run_git(self.repo_path, "merge", "--abort", check=False)
+                    logger.info(f"#{self.project_name}: merge of {branch} failed: {output}")
+                    report.reason = "merge conflict"
+                    return report
+
+            await run_git(self.repo_path, "branch", "-d", branch)
+            report.status = "merged"
+            logger.info(f"#{self.project_name}: merged {branch} into {current}")
+            return report
+
+    async def _save_unfinished(self, worktree: Worktree) -> bool:
+        """Keep a run's unmerged work on its branch. Returns False if there was none."""
+        branch = worktree.branch
+        await self._commit(worktree, "Unfinished task (run did not complete)")
+        await run_git(worktree.path, "checkout", "-q", "--detach")
+        _, count = await run_git(worktree.path, "rev-list", "--count", f"{worktree.base}..{branch}")
+        if int(count or 0) == 0:
+            await run_git(self.repo_path, "branch", "-D", branch)
+            return False
+        logger.info(f"#{self.project_name}: unfinished work left on {branch}")
+        await self._prune_branches()
+        return True
+
+    async def _prune_branches(self) -> None:
+        """Delete this project's task branches older than BRANCH_RETENTION_DAYS."""
+        cutoff = time.time() - BRANCH_RETENTION_DAYS * 86400
+        _, refs = await run_git(
+            self.repo_path, "for-each-ref", "--format=%(committerdate:unix) %(refname:short)",
+            f"refs/heads/{BRANCH_PREFIX}/{self._slug}/",
+        )
+        for line in refs.splitlines():
+            stamp, branch = line.split(" ", 1)
+            if int(stamp) < cutoff:
+                # Fails (and is skipped) for a branch a worktree still has checked out
+                code, _ = await run_git(self.repo_path, "branch", "-D", branch, check=False)
+                if code == 0:
+                    logger.info(f"#{self.project_name}: deleted old task branch {branch}")
+
+    async def _commit(self, worktree: Worktree, message: str) -> None:
+        """Commit everything in the worktree, if anything changed."""
+        await run_git(worktree.path, "add", "-A")
+        code, _ = await run_git(worktree.path, "diff", "--cached", "--quiet", check=False)
+        if code != 0:
+            await run_git(worktree.path, *self._identity, "commit", "-q", "-m", message)
+
+    async def _clean(self, worktree: Worktree) -> None:
+        """Drop leftovers of the previous task (ignored files such as build caches stay)."""
+        await run_git(worktree.path, "reset", "-q", "--hard")
+        await run_git(worktree.path, "clean", "-q", "-fd")
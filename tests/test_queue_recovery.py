@@ -0,0 +1,65 @@
+"""Recovery of durable queue tasks after a restart."""
+
+import asyncio
+import time
+
+from src.queue_manager import QueueManager, QueuedTask
+from src.task_store import TaskStore
+
+
+def _store_task(store: TaskStore, prompt: str, deadline: float, running: bool) -> int:
+    """Write a task row as a previous run would have left it."""
+    task_id = store.add(
+        project_name="proj",
+        chat_id=1,
+        message_id=1,
+        prompt=prompt,
+        image_paths=[],
+        priority="interactive",
+        kind="message",
+        created_at=time.time() - 120,
+        deadline=deadline,
+    )
+    if running:
+        store.mark_running(task_id)
+    return task_id
+
+
+def _recover(tmp_path, ttl: float = 0.0) -> tuple[list[int], list[int]]:
+    """Re-queue every stored task. Returns (IDs run, IDs expired)."""
+    ran: list[int] = []
+    expired: list[int] = []
+
+    async def process(task: QueuedTask) -> None:
+        ran.append(task.task_id)
+
+    async def on_expired(task: QueuedTask) -> None:
+        expired.append(task.task_id)
+
+    async def main() -> None:
+        queue = QueueManager(store=TaskStore(str(tmp_path)), on_expired=on_expired)
+        if ttl:
+            queue.set_ttl("proj", ttl)
+        for task in queue.load_stored():
+            await queue.enqueue(task, process)
+        await asyncio.sleep(0.1)
+        await queue.close()
+
+    asyncio.run(main())
+    return ran, expired
+
+
+def test_interrupted_task_restarts_after_its_deadline(tmp_path):
+    store = TaskStore(str(tmp_path))
+    task_id = _store_task(store, "was running", deadline=time.time() - 60, running=True)
+    store.close()
+
+    assert _recover(tmp_path, ttl=30) == ([task_id], [])
+
+
+def test_pending_task_past_its_deadline_expires(tmp_path):
+    store = TaskStore(str(tmp_path))
+    task_id = _store_task(store, "never started", deadline=time.time() - 60, running=False)
+    store.close()
+
+    assert _recover(tmp_path) == ([], [task_id])